@@ -7,8 +7,34 @@ import shutil
 import time
 import json
 import platform
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import io
+import hashlib
+import hmac
+import secrets
+import asyncio
+import locale
+import signal
+import re
+import threading
+import base64
+import struct
+import glob
+import argparse
+import contextlib
+import queue
+import urllib.error
+import urllib.request
+import uuid
+import zipfile
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import dataclasses
+from dataclasses import dataclass, field
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
@@ -45,408 +71,1875 @@ try:
 except ImportError:  # pragma: no cover
     Presentation = None
 
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover
+    Image = None
+
+try:
+    import pymupdf as fitz  # PyMuPDF，用于渲染预览缩略图
+except ImportError:  # pragma: no cover
+    try:
+        import fitz  # 旧版 PyMuPDF 只提供 fitz 模块名
+    except ImportError:
+        fitz = None
+
+
+_MAX_SLIDE_NUMBER = 10000  # 防止误输入超大范围展开出巨量编号
+
+
+def parse_slide_range(spec: Optional[str]) -> Optional[List[int]]:
+    """解析 "5-20,25" 形式的幻灯片范围（编号从 1 开始），返回去重升序的编号；空字符串表示全部"""
+    if spec is None or not spec.strip():
+        return None
+    numbers = set()
+    # "5 - 20" 这样带空格的写法先收紧，再按逗号、顿号、空白等分段
+    spec = re.sub(r"\s*([-–~])\s*", r"\1", spec.strip())
+    for part in re.split(r"[,，、;；\s]+", spec):
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)(?:[-–~](\d+))?", part)
+        if match is None:
+            raise ValueError(f"无法识别的幻灯片范围：{part}")
+        start = int(match.group(1))
+        end = int(match.group(2) or start)
+        if start < 1 or end < start or end > _MAX_SLIDE_NUMBER:
+            raise ValueError(f"无效的幻灯片范围：{part}")
+        numbers.update(range(start, end + 1))
+    return sorted(numbers)
+
+
+def slide_runs(numbers: List[int]) -> List[Tuple[int, int]]:
+    """把升序编号合并成连续区间 [(起, 止), ...]"""
+    runs: List[Tuple[int, int]] = []
+    for number in numbers:
+        if runs and number == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], number)
+        else:
+            runs.append((number, number))
+    return runs
+
+
+def format_slide_range(numbers: Optional[List[int]]) -> Optional[str]:
+    if not numbers:
+        return None
+    return ",".join(str(start) if start == end else f"{start}-{end}" for start, end in slide_runs(numbers))
+
+
+_SLIDE_PART = re.compile(r"ppt/slides/slide\d+\.xml")
+
+
+def count_pptx_slides(ppt_path: str) -> Optional[int]:
+    """数 pptx 压缩包里的幻灯片部件得到实际页数；.ppt 等读不出时返回 None"""
+    try:
+        with zipfile.ZipFile(ppt_path) as archive:
+            count = sum(1 for name in archive.namelist() if _SLIDE_PART.fullmatch(name))
+    except (OSError, zipfile.BadZipFile):
+        return None
+    return count or None
+
 
 @dataclass
 class PPTItem:
     display_name: str
     file_path: str
+    slides: Optional[str] = None  # 只合并这些幻灯片，如 "5-20,25"；为空表示全部（输出保持原顺序）
+
+    def __post_init__(self):
+        # 统一为规范写法，缓存键和运行日志不会因书写差异而失效；写法有误时抛出 ValueError
+        self.slides = format_slide_range(parse_slide_range(self.slides))
+
+    @property
+    def key(self) -> str:
+        """运行日志中标识输入的键：路径加幻灯片范围"""
+        path = os.path.normpath(self.file_path)
+        return f"{path}#{self.slides}" if self.slides else path
+
+    @property
+    def label(self) -> str:
+        """列表和目录中显示的名称"""
+        return f"{self.display_name}（第 {self.slides} 页）" if self.slides else self.display_name
+
+    def slide_numbers(self, total: int) -> List[int]:
+        """按实际幻灯片数截断后的编号；范围完全超出时报错"""
+        numbers = parse_slide_range(self.slides)
+        if numbers is None:
+            return list(range(1, total + 1))
+        numbers = [number for number in numbers if number <= total]
+        if not numbers:
+            raise RuntimeError(f"{self.display_name} 只有 {total} 页，幻灯片范围 {self.slides} 超出范围")
+        return numbers
 
 
-class DraggableListbox(tk.Listbox):
-    def __init__(self, master, **kwargs):
-        super().__init__(master, **kwargs)
-        self._dragging = False
-        self._drag_start_index: Optional[int] = None
-        self.bind("<ButtonPress-1>", self._on_button_press)
-        self.bind("<ButtonRelease-1>", self._on_button_release)
-        self.bind("<B1-Motion>", self._on_motion)
+@dataclass
+class PDFOptimizeOptions:
+    """合并后 PDF 的压缩参数"""
+
+    enabled: bool = False
+    target_dpi: int = 150
+    jpeg_quality: int = 80
+    compress_streams: bool = True
+    dedupe_objects: bool = True  # 合并多份文稿中内容相同的图片、字体等流对象
+    max_size_mb: Optional[float] = None  # 设置后自动逐级降低画质，直到文件不超过该大小
+    min_dpi: int = 72
+    min_quality: int = 40
+    workers: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "PDFOptimizeOptions":
+        return _options_from_dict(cls, data)
+
+    def to_dict(self) -> dict:
+        return _options_to_dict(self)
+
+    def validate(self):
+        """检查来自请求的取值，类型或范围不对时抛出 ValueError，而不是让压缩进程崩溃"""
+        for name in ("enabled", "compress_streams", "dedupe_objects"):
+            if not isinstance(getattr(self, name), bool):
+                raise ValueError(f"pdf_optimize.{name} 必须是 true 或 false")
+        limits = {"target_dpi": (1, 2400), "min_dpi": (1, 2400), "jpeg_quality": (1, 100), "min_quality": (1, 100)}
+        if self.workers is not None:
+            limits["workers"] = (1, 64)
+        for name, (low, high) in limits.items():
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+                raise ValueError(f"pdf_optimize.{name} 必须是 {low}～{high} 之间的整数")
+        if self.max_size_mb is not None and (
+            isinstance(self.max_size_mb, bool)
+            or not isinstance(self.max_size_mb, (int, float))
+            or not 0 < self.max_size_mb < float("inf")
+        ):
+            raise ValueError("pdf_optimize.max_size_mb 必须是正数")
+
+
+def _options_from_dict(cls, data: Optional[dict]):
+    """从配置文件读取选项，忽略未知键并保留默认值"""
+    options = cls()
+    if not isinstance(data, dict):
+        return options
+    for key in options.__dataclass_fields__:
+        if key in data:
+            setattr(options, key, data[key])
+    return options
+
+
+def _options_to_dict(options) -> dict:
+    return {key: getattr(options, key) for key in options.__dataclass_fields__}
 
-    def _on_button_press(self, event):
-        self._dragging = True
-        self._drag_start_index = self.nearest(event.y)
 
-    def _on_motion(self, event):
-        if not self._dragging or self._drag_start_index is None:
-            return
-        new_index = self.nearest(event.y)
-        if new_index == self._drag_start_index or new_index < 0:
+@dataclass
+class ImageSaving:
+    page_number: int
+    name: str
+    original_size: Tuple[int, int]
+    new_size: Tuple[int, int]
+    original_bytes: int
+    new_bytes: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.new_bytes
+
+
+@dataclass
+class OptimizeReport:
+    input_bytes: int = 0
+    output_bytes: int = 0
+    target_dpi: int = 0
+    jpeg_quality: int = 0
+    attempts: int = 0
+    fits_budget: bool = True
+    images: List[ImageSaving] = field(default_factory=list)
+
+    def summary(self, top: int = 5) -> str:
+        lines = [
+            f"压缩前：{_format_bytes(self.input_bytes)}  压缩后：{_format_bytes(self.output_bytes)}",
+            f"图片目标分辨率：{self.target_dpi} DPI  JPEG 质量：{self.jpeg_quality}  尝试次数：{self.attempts}",
+        ]
+        if self.images:
+            total_saved = sum(item.saved_bytes for item in self.images)
+            lines.append(f"共压缩图片 {len(self.images)} 张，节省 {_format_bytes(total_saved)}")
+            for item in sorted(self.images, key=lambda i: i.saved_bytes, reverse=True)[:top]:
+                lines.append(
+                    f"  第 {item.page_number} 页 {item.name}: "
+                    f"{item.original_size[0]}x{item.original_size[1]} → {item.new_size[0]}x{item.new_size[1]}, "
+                    f"{_format_bytes(item.original_bytes)} → {_format_bytes(item.new_bytes)}"
+                )
+        if not self.fits_budget:
+            lines.append("⚠️ 已降到最低画质，文件仍超过大小上限")
+        return "\n".join(lines)
+
+
+def _format_bytes(num: int) -> str:
+    value = float(num)
+    for unit in ("B", "KB", "MB"):
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB"
+
+
+def _downsample_image_job(job: Tuple[str, bytes, str, int, int, str, float, int]) -> Tuple[str, Optional[bytes], int, int]:
+    """在子进程中解码并缩小单张图片，返回新的 JPEG 数据（无收益或无法处理时返回 None，保留原图）"""
+    key, data, kind, width, height, mode, scale, quality = job
+    try:
+        if kind == "jpeg":
+            img = Image.open(io.BytesIO(data))
+            img.load()
+        else:
+            img = Image.frombytes(mode, (width, height), data)
+        if img.mode not in ("RGB", "L"):
+            return key, None, width, height
+
+        new_width = max(1, int(round(img.width * scale)))
+        new_height = max(1, int(round(img.height * scale)))
+        if (new_width, new_height) != img.size:
+            img = img.resize((new_width, new_height), Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=quality, optimize=True)
+    except (OSError, ValueError, SyntaxError, MemoryError, Image.DecompressionBombError):
+        # Pillow 不支持的编码、数据长度与宽高不符等：单张图片失败不影响整个合并
+        return key, None, width, height
+    return key, buffer.getvalue(), new_width, new_height
+
+
+def _collect_pdf_images(writer) -> List[Tuple[int, str, object]]:
+    """遍历每页（含嵌套表单）的图片 XObject，同一对象只返回一次"""
+    images: List[Tuple[int, str, object]] = []
+    seen = set()
+
+    def visit(resources, page_number: int):
+        if not resources or "/XObject" not in resources:
             return
-        item_text = self.get(self._drag_start_index)
-        self.delete(self._drag_start_index)
-        self.insert(new_index, item_text)
-        self.selection_clear(0, tk.END)
-        self.selection_set(new_index)
-        self._drag_start_index = new_index
-        self.event_generate("<<ListboxReordered>>")
+        xobjects = resources["/XObject"].get_object()
+        for name, ref in xobjects.items():
+            obj = ref.get_object()
+            obj_key = getattr(ref, "idnum", None) or id(obj)
+            if obj_key in seen:
+                continue
+            seen.add(obj_key)
+            subtype = obj.get("/Subtype")
+            if subtype == "/Image":
+                images.append((page_number, str(name), obj))
+            elif subtype == "/Form":
+                visit(obj.get("/Resources"), page_number)
+
+    for page_number, page in enumerate(writer.pages, start=1):
+        resources = page.get("/Resources")
+        visit(resources.get_object() if resources is not None else None, page_number)
+    return images
+
+
+def _build_image_job(key: str, obj, dpi_scale: float, quality: int):
+    """把可处理的图片对象转成子进程任务；不支持的编码/色彩空间返回 None"""
+    if obj.get("/ImageMask") or obj.get("/BitsPerComponent", 8) != 8:
+        return None
+    filters = obj.get("/Filter")
+    if filters is None:
+        filters = []
+    elif not isinstance(filters, list):
+        filters = [filters]
+    filters = [str(name) for name in filters]
+    color_space = obj.get("/ColorSpace")
+    width = int(obj.get("/Width", 0))
+    height = int(obj.get("/Height", 0))
+    if not width or not height:
+        return None
+
+    # 外层可能包着 ASCII85/Flate 等无损编码，get_data() 会逐层解开，DCT 数据保持为 JPEG 原文
+    lossless = {"/FlateDecode", "/ASCII85Decode", "/ASCIIHexDecode"}
+    if filters and filters[-1] == "/DCTDecode" and set(filters[:-1]) <= lossless:
+        return (key, obj.get_data(), "jpeg", width, height, "", dpi_scale, quality)
+    if set(filters) <= lossless and color_space in ("/DeviceRGB", "/DeviceGray"):
+        mode = "RGB" if color_space == "/DeviceRGB" else "L"
+        return (key, obj.get_data(), "raw", width, height, mode, dpi_scale, quality)
+    return None
+
+
+def _compress_page_contents(writer, page):
+    """
+    合并页面的内容流并 Flate 压缩。
+    PyPDF2 3.0 的 compress_content_streams 把压缩后的流直接写进页面字典，而流必须是间接对象，输出的 PDF 不合规；
+    这里把新流写回原来的对象编号（原本是单个流时），否则登记为新的间接对象。
+    """
+    from PyPDF2.generic import ContentStream, IndirectObject, NameObject
+
+    content = page.get_contents()
+    if content is None:
+        return
+    if not isinstance(content, ContentStream):
+        content = ContentStream(content, page.pdf)
+    compressed = content.flate_encode()
+    reference = page.get("/Contents")
+    if isinstance(reference, IndirectObject) and reference.pdf is writer:
+        writer._objects[reference.idnum - 1] = compressed
+    else:
+        page[NameObject("/Contents")] = writer._add_object(compressed)
+
+
+def _dedupe_streams(writer) -> int:
+    """
+    合并内容完全相同的流对象（多份文稿共用的模板图片、字体等），返回去掉的对象数。
+    PyPDF2 3.0 没有 compress_identical_objects：按序列化结果找出重复流，引用改指向第一份，重复的对象置为 null。
+    流的字典可能引用其他流（如 /SMask），因此重复处理直到没有新的重复。
+    """
+    from PyPDF2.generic import ArrayObject, DictionaryObject, IndirectObject, NullObject, StreamObject
+
+    def rewrite(value, duplicates: Dict[int, int]):
+        if isinstance(value, IndirectObject) and value.pdf is writer and value.idnum in duplicates:
+            return IndirectObject(duplicates[value.idnum], 0, writer)
+        if isinstance(value, DictionaryObject):
+            for key, item in list(dict.items(value)):
+                value[key] = rewrite(item, duplicates)
+        elif isinstance(value, ArrayObject):
+            for index, item in enumerate(value):
+                value[index] = rewrite(item, duplicates)
+        return value
+
+    removed = 0
+    while True:
+        first_by_digest: Dict[str, int] = {}
+        duplicates: Dict[int, int] = {}
+        for idnum, obj in enumerate(writer._objects, start=1):
+            if not isinstance(obj, StreamObject):
+                continue
+            buffer = io.BytesIO()
+            obj.write_to_stream(buffer, None)
+            digest = hashlib.sha1(buffer.getvalue()).hexdigest()
+            if digest in first_by_digest:
+                duplicates[idnum] = first_by_digest[digest]
+            else:
+                first_by_digest[digest] = idnum
+        if not duplicates:
+            return removed
+        for idnum in duplicates:
+            writer._objects[idnum - 1] = NullObject()
+        for obj in writer._objects:
+            rewrite(obj, duplicates)
+        removed += len(duplicates)
+
+
+def _optimize_pdf_once(input_path: str, target_dpi: int, quality: int, options: PDFOptimizeOptions):
+    from PyPDF2.generic import NameObject, NumberObject
+
+    reader = PyPDF2.PdfReader(input_path)
+    writer = PyPDF2.PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+
+    page_sizes = [
+        (float(page.mediabox.width), float(page.mediabox.height)) for page in writer.pages
+    ]
+
+    savings: List[ImageSaving] = []
+    if Image is not None:
+        jobs = []
+        targets: Dict[str, Tuple[int, str, object]] = {}
+        for index, (page_number, name, obj) in enumerate(_collect_pdf_images(writer)):
+            page_w, page_h = page_sizes[page_number - 1]
+            width = int(obj.get("/Width", 0))
+            height = int(obj.get("/Height", 0))
+            # 以整页尺寸估算有效 DPI：图片实际显示区域不会大于页面，因此只会低估、不会误缩
+            effective_dpi = max(width / max(page_w / 72.0, 1e-6), height / max(page_h / 72.0, 1e-6))
+            scale = min(1.0, target_dpi / effective_dpi) if effective_dpi else 1.0
+            key = str(index)
+            job = _build_image_job(key, obj, scale, quality)
+            if job is None:
+                continue
+            jobs.append(job)
+            targets[key] = (page_number, name, obj)
+
+        if jobs:
+            if len(jobs) > 1:
+                try:
+                    with ProcessPoolExecutor(max_workers=options.workers) as pool:
+                        results = list(pool.map(_downsample_image_job, jobs))
+                except Exception:
+                    # 进程池不可用（如受限环境）时退回串行处理
+                    results = [_downsample_image_job(job) for job in jobs]
+            else:
+                results = [_downsample_image_job(job) for job in jobs]
+
+            for key, new_data, new_width, new_height in results:
+                page_number, name, obj = targets[key]
+                old_bytes = len(obj._data)
+                if new_data is None or len(new_data) >= old_bytes:
+                    continue
+                original_size = (int(obj["/Width"]), int(obj["/Height"]))
+                obj._data = new_data
+                obj.decoded_self = None
+                obj[NameObject("/Filter")] = NameObject("/DCTDecode")
+                obj[NameObject("/Width")] = NumberObject(new_width)
+                obj[NameObject("/Height")] = NumberObject(new_height)
+                obj[NameObject("/Length")] = NumberObject(len(new_data))
+                if "/DecodeParms" in obj:
+                    del obj["/DecodeParms"]
+                savings.append(
+                    ImageSaving(page_number, name, original_size, (new_width, new_height), old_bytes, len(new_data))
+                )
 
-    def _on_button_release(self, _event):
-        self._dragging = False
-        self._drag_start_index = None
+    if options.compress_streams:
+        for page in writer.pages:
+            _compress_page_contents(writer, page)
+
+    if options.dedupe_objects:
+        _dedupe_streams(writer)
+
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue(), savings
+
+
+def optimize_pdf(input_path: str, output_path: str, options: PDFOptimizeOptions) -> OptimizeReport:
+    """压缩 PDF：重新压缩内容流、降采样图片；设置了大小上限时逐级降低画质"""
+    report = OptimizeReport(input_bytes=os.path.getsize(input_path))
+    budget = int(options.max_size_mb * 1024 * 1024) if options.max_size_mb else None
+
+    dpi = int(options.target_dpi)
+    quality = int(options.jpeg_quality)
+    best: Optional[Tuple[bytes, List[ImageSaving], int, int]] = None
+    while True:
+        data, savings = _optimize_pdf_once(input_path, dpi, quality, options)
+        report.attempts += 1
+        if best is None or len(data) < len(best[0]):
+            best = (data, savings, dpi, quality)
+        if budget is None or len(data) <= budget:
+            break
+        if dpi <= options.min_dpi and quality <= options.min_quality:
+            break
+        # 每轮同时降低 JPEG 质量和目标分辨率，直到触底
+        if quality > options.min_quality:
+            quality = max(options.min_quality, quality - 10)
+        if dpi > options.min_dpi:
+            dpi = max(options.min_dpi, int(dpi * 0.75))
+
+    data, savings, report.target_dpi, report.jpeg_quality = best
+    report.fits_budget = budget is None or len(data) <= budget
+    if report.input_bytes <= len(data) and not savings:
+        # 压缩没有收益时保留原始文件
+        with open(input_path, "rb") as src_file:
+            atomic_write(output_path, lambda out_file: shutil.copyfileobj(src_file, out_file))
+        report.output_bytes = report.input_bytes
+        return report
+
+    atomic_write(output_path, lambda out_file: out_file.write(data))
+    report.output_bytes = len(data)
+    report.images = savings
+    return report
+
+
+def _fsync_directory(directory: str):
+    """让目录项（重命名结果）落盘；Windows 不支持对目录 fsync，直接跳过"""
+    if os.name != "posix":
+        return
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _default_file_mode() -> int:
+    """普通 open() 新建文件时的权限（0o666 去掉 umask）；umask 只能改了再读，因此在导入时（尚无其他线程）取一次"""
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_DEFAULT_FILE_MODE = _default_file_mode()
+
+
+def _match_target_mode(tmp_path: str, final_path: str):
+    """mkstemp 建的临时文件是 0600；替换前改成目标原有权限或普通新建文件的权限，其他用户仍可读"""
+    try:
+        mode = os.stat(final_path).st_mode & 0o7777
+    except OSError:
+        mode = _DEFAULT_FILE_MODE
+    try:
+        os.chmod(tmp_path, mode)
+    except OSError:
+        pass
+
+
+def commit_temp_file(tmp_path: str, final_path: str):
+    """将已写完的临时文件 fsync 后原子替换为最终文件"""
+    with open(tmp_path, "rb+") as tmp_file:
+        os.fsync(tmp_file.fileno())
+    _match_target_mode(tmp_path, final_path)
+    os.replace(tmp_path, final_path)
+    _fsync_directory(os.path.dirname(os.path.abspath(final_path)))
+
+
+def atomic_write(path: str, write_fn, mode: str = "wb"):
+    """先写同目录临时文件并 fsync，再原子重命名；中途崩溃不会留下半截的目标文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".~" + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with os.fdopen(fd, mode, encoding=encoding) as handle:
+            write_fn(handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        _match_target_mode(tmp_path, path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
 
 
-class PPTMergerApp:
-    def __init__(self, root: tk.Tk):
-        self.root = root
-        self.root.title("PPT 转 PDF 合并工具")
-        self.root.minsize(780, 460)
+def reserve_output_path(folder: str, stem: str, ext: str) -> str:
+    """用 O_EXCL 原子地占用一个不重名的输出文件名（stem.ext、stem_1.ext ...）"""
+    counter = 0
+    while True:
+        name = f"{stem}{ext}" if counter == 0 else f"{stem}_{counter}{ext}"
+        path = os.path.join(folder, name)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            counter += 1
+            continue
+        os.close(fd)
+        return path
 
-        ttkb_window_cls = getattr(ttkb, "Window", None)
-        self.use_bootstrap = ttkb_window_cls is not None and isinstance(self.root, ttkb_window_cls)
-        self.style = ttk.Style(self.root)
-        self._style_map = {
-            "success": "Success.TButton",
-            "primary": "Primary.TButton",
-            "info": "Info.TButton",
-            "secondary": "Secondary.TButton",
-        }
-        self._configure_styles()
 
-        self.script_dir = os.path.abspath(os.path.dirname(sys.argv[0] or __file__))
-        self.vbs_path = os.path.normpath(os.path.join(self.script_dir, "单个ppt转为pdf.vbs"))
-        self.config_path = os.path.join(self.script_dir, "ppt_merger_settings.json")
-        self.font_regular = "Helvetica"
-        self.font_bold = "Helvetica-Bold"
-        self._font_checked = False
-        self.is_windows = platform.system() == "Windows"
-        self.is_mac = platform.system() == "Darwin"
+def release_reserved_path(path: str):
+    """合并失败时删除仍为空的占位文件"""
+    try:
+        if os.path.getsize(path) == 0:
+            os.remove(path)
+    except OSError:
+        pass
 
-        self.folder_path: Optional[str] = None
-        self.available_items: List[PPTItem] = []
-        self.selected_items: List[PPTItem] = []
 
-        self._build_ui()
-        self._ensure_chinese_font()
-        self._load_last_state()
+def _file_signature(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
 
-    def _build_ui(self):
-        outer = ttk.Frame(self.root, padding=(12, 12))
-        outer.pack(fill=tk.BOTH, expand=True)
 
-        chooser_frame = ttk.Frame(outer)
-        chooser_frame.pack(fill=tk.X)
+class RunJournal:
+    """记录 PDF 合并运行中已完成的转换和阶段，失败后重跑可从断点继续"""
 
-        ttk.Label(chooser_frame, text="当前目录：").pack(side=tk.LEFT)
-        self.folder_var = tk.StringVar(value="尚未选择")
-        folder_entry = ttk.Entry(chooser_frame, textvariable=self.folder_var, state="readonly")
-        folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 8))
+    def __init__(self, journal_dir: str, run_key: str):
+        digest = hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(journal_dir, f"run_{digest}.json")
+        self.data = {"run_key": run_key, "conversions": {}, "stages": {}}
+        try:
+            with open(self.path, "r", encoding="utf-8") as journal_file:
+                loaded = json.load(journal_file)
+            if loaded.get("run_key") == run_key:
+                self.data["conversions"].update(loaded.get("conversions", {}))
+                self.data["stages"].update(loaded.get("stages", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
 
-        self._create_button(chooser_frame, text="选择目录", command=self.choose_folder, bootstyle="primary").pack(
-            side=tk.LEFT
+    @classmethod
+    def for_run(cls, journal_dir: str, folder: str, mode_label: str) -> "RunJournal":
+        run_key = json.dumps([os.path.normcase(os.path.abspath(folder)), mode_label], ensure_ascii=False)
+        return cls(journal_dir, run_key)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        atomic_write(
+            self.path,
+            lambda handle: json.dump(self.data, handle, ensure_ascii=False, indent=2),
+            mode="w",
         )
 
-        lists_frame = ttk.Frame(outer)
-        lists_frame.pack(fill=tk.BOTH, expand=True, pady=12)
+    def completed_conversion(self, ppt_path: str, key: Optional[str] = None) -> Optional[Tuple[str, bool]]:
+        """源文件未变且 PDF 仍在时，返回 (pdf_path, existed_before)；key 默认为源文件路径"""
+        entry = self.data["conversions"].get(key or ppt_path)
+        if not entry:
+            return None
+        if _file_signature(ppt_path) != entry.get("source"):
+            return None
+        if _file_signature(entry["pdf_path"]) != entry.get("pdf"):
+            return None
+        return entry["pdf_path"], bool(entry.get("existed_before"))
+
+    def record_conversion(self, ppt_path: str, pdf_path: str, existed_before: bool, key: Optional[str] = None):
+        self.data["conversions"][key or ppt_path] = {
+            "pdf_path": pdf_path,
+            "existed_before": existed_before,
+            "source": _file_signature(ppt_path),
+            "pdf": _file_signature(pdf_path),
+        }
+        self.save()
+
+    def completed_output(self, stage: str, order: List[str]) -> Optional[str]:
+        """阶段已完成、输入顺序一致且输出文件未被改动时返回输出路径"""
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("order") != order:
+            return None
+        if _file_signature(entry["output_path"]) != entry.get("output"):
+            return None
+        return entry["output_path"]
+
+    def mark_stage(self, stage: str, order: List[str], output_path: str):
+        self.data["stages"][stage] = {
+            "order": order,
+            "output_path": output_path,
+            "output": _file_signature(output_path),
+        }
+        self.save()
 
-        # 可选列表
-        left_frame = ttk.Frame(lists_frame)
-        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        ttk.Label(left_frame, text="可选 PPT 文件").pack()
-        self.available_listbox = tk.Listbox(left_frame, selectmode=tk.EXTENDED)
-        self.available_listbox.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+    def intermediate_pdfs(self) -> List[str]:
+        return [
+            entry["pdf_path"]
+            for entry in self.data["conversions"].values()
+            if not entry.get("existed_before")
+        ]
 
-        # 中间按钮
-        middle_frame = ttk.Frame(lists_frame)
-        middle_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10)
-        self._create_button(middle_frame, text="全选 →", command=self.add_all, bootstyle="secondary").pack(
-            pady=6, fill=tk.X
-        )
-        self._create_button(middle_frame, text="添加 →", command=self.add_selected, bootstyle="primary").pack(
-            pady=6, fill=tk.X
-        )
-        self._create_button(middle_frame, text="← 移除", command=self.remove_selected, bootstyle="info").pack(
-            pady=6, fill=tk.X
-        )
-        self._create_button(middle_frame, text="清空", command=self.clear_selected, bootstyle="secondary").pack(
-            pady=6, fill=tk.X
-        )
+    def finish(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
 
-        # 已选列表
-        right_frame = ttk.Frame(lists_frame)
-        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        ttk.Label(right_frame, text="已选 PPT 文件（可拖拽排序）").pack()
-        self.selected_listbox = DraggableListbox(right_frame, selectmode=tk.BROWSE)
-        self.selected_listbox.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
-        self.selected_listbox.bind("<<ListboxReordered>>", self._sync_order_with_model)
 
-        # 底部按钮
-        bottom_frame = ttk.Frame(outer)
-        bottom_frame.pack(fill=tk.X)
+@dataclass
+class ConverterOptions:
+    """外部转换进程的监管参数"""
 
-        # 第一行：合并PPT按钮
-        merge_ppt_frame = ttk.Frame(bottom_frame)
-        merge_ppt_frame.pack(fill=tk.X, pady=(0, 4))
-        
-        self._create_button(
-            merge_ppt_frame,
-            text="合并为 PPT",
-            command=self.merge_ppts,
-            bootstyle="info",
-        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+    timeout: float = 180.0  # 单个文件的超时时间（秒）
+    retries: int = 2  # 失败或超时后的重试次数
+    backoff: float = 2.0  # 首次重试前的等待时间，之后逐次翻倍
+    max_concurrency: int = 1  # PowerPoint 只有一个 COM 实例，默认串行
+    # 超时后一并结束的进程名：PowerPoint 由 DCOM 启动，不是 cscript 的子进程，结束进程树碰不到它
+    orphan_processes: List[str] = field(default_factory=lambda: ["POWERPNT.EXE"])
 
-        # 第二行：PDF合并按钮
-        pdf_frame = ttk.Frame(bottom_frame)
-        pdf_frame.pack(fill=tk.X)
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "ConverterOptions":
+        return _options_from_dict(cls, data)
 
-        self._create_button(
-            pdf_frame,
-            text="博士组会",
-            command=lambda: self.start_process("博士组会"),
-            bootstyle="success",
-        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4, pady=(0, 4))
+    def to_dict(self) -> dict:
+        return _options_to_dict(self)
 
-        self._create_button(
-            pdf_frame,
-            text="大模型和开放世界组组会",
-            command=lambda: self.start_process("大模型和开放世界组组会"),
-            bootstyle="primary",
-        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4, pady=(0, 4))
 
-    def _create_button(self, parent, text, command, bootstyle="secondary", **kwargs):
-        if self.use_bootstrap and ttkb is not None:
-            return ttkb.Button(parent, text=text, command=command, bootstyle=bootstyle, **kwargs)
+@dataclass
+class ConversionAttempt:
+    attempt: int
+    returncode: Optional[int]
+    timed_out: bool
+    elapsed: float
+    stdout: str
+    stderr: str
 
-        style_name = self._style_map.get(bootstyle.lower(), "TButton")
-        button = ttk.Button(parent, text=text, command=command, style=style_name, **kwargs)
-        return button
 
-    def _configure_styles(self):
-        if self.use_bootstrap:
-            return
+@dataclass
+class ConversionResult:
+    key: str
+    command: List[str]
+    attempts: List[ConversionAttempt] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.attempts) and self.attempts[-1].returncode == 0 and not self.attempts[-1].timed_out
+
+    @property
+    def last(self) -> Optional[ConversionAttempt]:
+        return self.attempts[-1] if self.attempts else None
+
+
+class ConversionError(RuntimeError):
+    """转换进程失败、超时或无法启动；保留每次尝试的退出码和输出"""
+
+    def __init__(self, result: ConversionResult, label: str = ""):
+        self.result = result
+        last = result.last
+        if last is None:
+            detail = "未能启动转换进程"
+        elif last.timed_out:
+            detail = f"超时（{last.elapsed:.0f} 秒）后已强制结束"
+        else:
+            detail = (last.stderr or last.stdout).strip() or f"进程返回非零退出码 {last.returncode}"
+        super().__init__(f"{label or result.key}：共尝试 {len(result.attempts)} 次，{detail}")
+
+
+def _decode_output(data: Optional[bytes]) -> str:
+    if not data:
+        return ""
+    return data.decode(locale.getpreferredencoding(False), errors="replace")
 
+
+def _kill_process_tree(proc):
+    """结束转换进程及其子进程（POSIX 用进程组，Windows 用 taskkill /T）"""
+    if proc.returncode is not None:
+        return
+    if os.name == "nt":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(proc.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    else:
         try:
-            self.style.theme_use("clam")
-        except tk.TclError:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
             pass
 
-        default_font = ("Microsoft YaHei", 11)
-        for style_name in {"TButton", *self._style_map.values()}:
-            self.style.configure(style_name, font=default_font, padding=6)
 
-        self.style.configure("Success.TButton", background="#4CAF50", foreground="white")
-        self.style.map(
-            "Success.TButton",
-            background=[("pressed", "#388E3C"), ("active", "#45A049")],
-            foreground=[("disabled", "#DDDDDD")],
-        )
+def list_processes(names: List[str]) -> Dict[int, str]:
+    """返回名称匹配（不区分大小写）的进程 {pid: 名称}；Windows 用 tasklist，其他系统用 ps"""
+    wanted = {name.lower() for name in names}
+    found: Dict[int, str] = {}
+    try:
+        if os.name == "nt":
+            output = subprocess.run(
+                ["tasklist", "/FO", "CSV", "/NH"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            ).stdout
+            for line in _decode_output(output).splitlines():
+                fields = [part.strip('"') for part in line.split('","')]
+                if len(fields) >= 2 and fields[0].lower() in wanted and fields[1].isdigit():
+                    found[int(fields[1])] = fields[0]
+        else:
+            output = subprocess.run(
+                ["ps", "-A", "-o", "pid=", "-o", "comm="], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            ).stdout
+            for line in _decode_output(output).splitlines():
+                pid, _, command = line.strip().partition(" ")
+                # macOS 的 comm 是完整路径，只比较文件名
+                name = os.path.basename(command.strip())
+                if pid.isdigit() and name.lower() in wanted:
+                    found[int(pid)] = name
+    except OSError:
+        pass
+    return found
+
+
+def _kill_pids(pids: List[int]):
+    for pid in pids:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+        else:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
 
-        self.style.configure("Primary.TButton", background="#2196F3", foreground="white")
-        self.style.map(
-            "Primary.TButton",
-            background=[("pressed", "#1976D2"), ("active", "#1E88E5")],
-            foreground=[("disabled", "#DDDDDD")],
-        )
 
-        self.style.configure("Info.TButton", background="#00ACC1", foreground="white")
-        self.style.map(
-            "Info.TButton",
-            background=[("pressed", "#00838F"), ("active", "#0097A7")],
-            foreground=[("disabled", "#DDDDDD")],
-        )
+class ConversionSupervisor:
+    """用 asyncio 并发运行外部转换命令，带超时、重试退避和整树结束"""
 
-        self.style.configure("Secondary.TButton", background="#607D8B", foreground="white")
-        self.style.map(
-            "Secondary.TButton",
-            background=[("pressed", "#455A64"), ("active", "#546E7A")],
-            foreground=[("disabled", "#DDDDDD")],
+    def __init__(
+        self, options: Optional[ConverterOptions] = None, cwd: Optional[str] = None, gate: Optional[Any] = None
+    ):
+        self.options = options or ConverterOptions()
+        self.cwd = cwd
+        # 可选的跨进程信号量（如 multiprocessing.BoundedSemaphore），限制所有进程合计的并发转换数
+        self.gate = gate
+
+    async def _run_once(self, command: List[str], attempt: int) -> ConversionAttempt:
+        kwargs = {}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+
+        loop = asyncio.get_running_loop()
+        orphan_names = list(self.options.orphan_processes or [])
+        # 记下尝试开始前已有的同名进程（如用户自己打开的 PowerPoint），超时时只结束本次新启动的
+        existing = set(await loop.run_in_executor(None, list_processes, orphan_names)) if orphan_names else set()
+
+        started = time.monotonic()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=self.cwd,
+                **kwargs,
+            )
+        except OSError as exc:
+            return ConversionAttempt(attempt, None, False, 0.0, "", str(exc))
+
+        timed_out = False
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), self.options.timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+            _kill_process_tree(proc)
+            if orphan_names:
+                orphans = set(await loop.run_in_executor(None, list_processes, orphan_names)) - existing
+                await loop.run_in_executor(None, _kill_pids, sorted(orphans))
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), 5)
+            except asyncio.TimeoutError:
+                stdout, stderr = b"", b""
+        return ConversionAttempt(
+            attempt,
+            proc.returncode,
+            timed_out,
+            time.monotonic() - started,
+            _decode_output(stdout),
+            _decode_output(stderr),
         )
 
-    def choose_folder(self):
-        folder = filedialog.askdirectory()
-        if not folder:
-            return
-        self.folder_path = folder
-        self.folder_var.set(folder)
-        self._load_ppt_files()
-        self._save_last_state()
+    async def run(self, key: str, command: List[str]) -> ConversionResult:
+        result = ConversionResult(key=key, command=list(command))
+        for attempt in range(1, max(0, int(self.options.retries)) + 2):
+            record = await self._run_once(command, attempt)
+            result.attempts.append(record)
+            if result.ok:
+                break
+            if record.returncode is None and not record.timed_out:
+                break  # 命令无法启动，重试没有意义
+            if attempt <= self.options.retries:
+                await asyncio.sleep(self.options.backoff * (2 ** (attempt - 1)))
+        return result
+
+    async def run_many(
+        self,
+        jobs: List[Tuple[str, List[str]]],
+        on_result: Optional[Callable[[ConversionResult], None]] = None,
+    ) -> List[ConversionResult]:
+        semaphore = asyncio.Semaphore(max(1, int(self.options.max_concurrency)))
+
+        async def guarded(key: str, command: List[str]) -> ConversionResult:
+            async with semaphore:
+                if self.gate is None:
+                    result = await self.run(key, command)
+                else:
+                    # 阻塞式获取放到线程中，避免卡住本进程的事件循环
+                    await asyncio.get_running_loop().run_in_executor(None, self.gate.acquire)
+                    try:
+                        result = await self.run(key, command)
+                    finally:
+                        self.gate.release()
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return list(await asyncio.gather(*(guarded(key, command) for key, command in jobs)))
+
+    def run_all(
+        self,
+        jobs: List[Tuple[str, List[str]]],
+        on_result: Optional[Callable[[ConversionResult], None]] = None,
+    ) -> List[ConversionResult]:
+        """同步入口：在独立事件循环中运行全部任务，结果顺序与 jobs 一致；每完成一个回调 on_result"""
+        # Windows 上只有 Proactor 事件循环支持子进程
+        loop = asyncio.ProactorEventLoop() if os.name == "nt" else asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_many(jobs, on_result))
+        finally:
+            loop.close()
 
-    def _load_last_state(self):
-        if not os.path.exists(self.config_path):
-            return
+
+@dataclass
+class StagingOptions:
+    """共享盘输入的本地暂存参数"""
+
+    mode: str = "auto"  # "auto"：仅网络路径启用；"always" / "never"
+    workers: int = 4  # 并行复制输入文件的线程数
+    root: Optional[str] = None  # 本地暂存根目录，默认在系统临时目录下
+    buffer_mb: int = 16  # 复制/上传时每次读写的块大小
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "StagingOptions":
+        return _options_from_dict(cls, data)
+
+    def to_dict(self) -> dict:
+        return _options_to_dict(self)
+
+
+_REMOTE_FS_TYPES = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "afpfs", "webdav", "fuse.sshfs", "9p"}
+
+
+@lru_cache(maxsize=1)
+def _mount_table() -> Tuple[Tuple[str, str], ...]:
+    """返回 (挂载点, 文件系统类型) 列表，Linux 读 /proc/mounts，macOS 解析 mount 输出"""
+    mounts: List[Tuple[str, str]] = []
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as mounts_file:
+            for line in mounts_file:
+                parts = line.split()
+                if len(parts) >= 3:
+                    # /proc/mounts 中空格等字符写成 \040 形式的八进制转义
+                    mount_point = re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), parts[1])
+                    mounts.append((mount_point, parts[2]))
+        return tuple(mounts)
+    except OSError:
+        pass
+    try:
+        output = subprocess.run(["mount"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    except OSError:
+        return tuple(mounts)
+    for line in output.splitlines():
+        match = re.match(r"^.* on (.*) \((\w+)[,)]", line)
+        if match:
+            mounts.append((match.group(1), match.group(2)))
+    return tuple(mounts)
+
+
+def is_remote_path(path: str) -> bool:
+    """判断路径是否位于 SMB/NFS 等网络文件系统上"""
+    path = os.path.abspath(path)
+    if os.name == "nt":
+        if path.startswith("\\\\"):
+            return True
         try:
-            with open(self.config_path, "r", encoding="utf-8") as cfg_file:
-                data = json.load(cfg_file)
-        except (OSError, json.JSONDecodeError):
-            return
-        folder = data.get("last_folder")
-        if not folder or not os.path.isdir(folder):
-            return
-        self.folder_path = folder
-        self.folder_var.set(folder)
-        self._load_ppt_files()
+            import ctypes
 
-    def _save_last_state(self):
-        data = {"last_folder": self.folder_path}
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return ctypes.windll.kernel32.GetDriveTypeW(drive) == 4  # DRIVE_REMOTE
+        except Exception:
+            return False
+
+    best_match, best_type = "", ""
+    for mount_point, fs_type in _mount_table():
+        prefix = mount_point.rstrip("/") + "/"
+        if (path + "/").startswith(prefix) and len(mount_point) > len(best_match):
+            best_match, best_type = mount_point, fs_type
+    return best_type.lower() in _REMOTE_FS_TYPES
+
+
+def _copy_file_sequential(src_path: str, dst_path: str, buffer_size: int):
+    """以大块顺序读写复制文件，目标端原子替换并保留修改时间"""
+    with open(src_path, "rb") as src_file:
+        atomic_write(dst_path, lambda dst_file: shutil.copyfileobj(src_file, dst_file, buffer_size))
+    shutil.copystat(src_path, dst_path)
+
+
+class StagingArea:
+    """把共享盘上的输入批量复制到本地暂存目录，在本地转换合并后一次性上传结果"""
+
+    def __init__(self, remote_folder: str, options: Optional[StagingOptions] = None):
+        self.options = options or StagingOptions()
+        self.remote_folder = os.path.abspath(remote_folder)
+        digest = hashlib.sha1(os.path.normcase(self.remote_folder).encode("utf-8")).hexdigest()[:16]
+        root = self.options.root or os.path.join(tempfile.gettempdir(), "ppt_merger_stage")
+        self.root = os.path.join(root, digest)
+        self.input_dir = os.path.join(self.root, "inputs")
+        self.output_dir = os.path.join(self.root, "outputs")
+        self.manifest_path = os.path.join(self.root, "manifest.json")
+        self.manifest: Dict[str, dict] = {}
         try:
-            with open(self.config_path, "w", encoding="utf-8") as cfg_file:
-                json.dump(data, cfg_file, ensure_ascii=False, indent=2)
-        except OSError:
+            with open(self.manifest_path, "r", encoding="utf-8") as manifest_file:
+                loaded = json.load(manifest_file)
+            if isinstance(loaded, dict):
+                self.manifest = loaded
+        except (OSError, ValueError):
             pass
 
-    def _load_ppt_files(self):
-        if not self.folder_path:
-            return
-        self.available_items.clear()
-        self.available_listbox.delete(0, tk.END)
-        self.clear_selected()
+    @property
+    def buffer_size(self) -> int:
+        return max(1, int(self.options.buffer_mb)) * 1024 * 1024
+
+    @classmethod
+    def for_folder(cls, folder: str, options: StagingOptions) -> Optional["StagingArea"]:
+        mode = str(options.mode).lower()
+        if mode == "never" or (mode == "auto" and not is_remote_path(folder)):
+            return None
+        return cls(folder, options)
+
+    def _save_manifest(self):
+        atomic_write(
+            self.manifest_path,
+            lambda handle: json.dump(self.manifest, handle, ensure_ascii=False, indent=2),
+            mode="w",
+        )
 
-        for entry in sorted(os.listdir(self.folder_path)):
-            if entry.lower().endswith((".ppt", ".pptx")):
-                full_path = os.path.join(self.folder_path, entry)
-                if os.path.isfile(full_path):
-                    item = PPTItem(display_name=entry, file_path=full_path)
-                    self.available_items.append(item)
-                    self.available_listbox.insert(tk.END, entry)
+    def local_path(self, remote_path: str) -> str:
+        """本地副本路径：文件名前加远端路径的哈希，不同目录下的同名文件不会互相覆盖"""
+        digest = hashlib.sha1(os.path.normcase(os.path.abspath(remote_path)).encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.input_dir, f"{digest}_{os.path.basename(remote_path)}")
+
+    def is_stale(self, remote_path: str) -> bool:
+        """按远端 mtime/size 判断本地副本是否过期；旧版按文件名存放的副本也视为过期"""
+        entry = self.manifest.get(remote_path)
+        if not entry or entry["local_path"] != self.local_path(remote_path) or not os.path.exists(entry["local_path"]):
+            return True
+        return _file_signature(remote_path) != entry.get("remote")
+
+    def _stage_one(self, remote_path: str) -> Tuple[str, str, Optional[List[int]]]:
+        signature = _file_signature(remote_path)
+        local_path = self.local_path(remote_path)
+        _copy_file_sequential(remote_path, local_path, self.buffer_size)
+        return remote_path, local_path, signature
+
+    def stage(self, remote_paths: List[str]) -> Dict[str, str]:
+        """并行复制过期的输入文件，返回 远端路径 -> 本地路径"""
+        os.makedirs(self.input_dir, exist_ok=True)
+        stale = [path for path in remote_paths if self.is_stale(path)]
+        if stale:
+            with ThreadPoolExecutor(max_workers=max(1, int(self.options.workers))) as pool:
+                for remote_path, local_path, signature in pool.map(self._stage_one, stale):
+                    self.manifest[remote_path] = {"local_path": local_path, "remote": signature}
+        # 远端已删除的文件不再保留本地副本
+        for remote_path in [path for path in self.manifest if not os.path.exists(path)]:
+            entry = self.manifest.pop(remote_path)
+            try:
+                os.remove(entry["local_path"])
+            except OSError:
+                pass
+        self._save_manifest()
+        return {path: self.manifest[path]["local_path"] for path in remote_paths}
 
-        if not self.available_items:
-            messagebox.showinfo("提示", "该目录中未找到 PPT 或 PPTX 文件。")
+    def upload(self, local_path: str, remote_path: str) -> str:
+        """把本地生成的最终文件一次顺序写入共享盘，随后删除本地副本"""
+        _copy_file_sequential(local_path, remote_path, self.buffer_size)
+        try:
+            os.remove(local_path)
+        except OSError:
+            pass
+        return remote_path
 
-    def add_selected(self):
-        indices = list(self.available_listbox.curselection())
-        if not indices:
-            messagebox.showwarning("提示", "请在左侧列表中选择至少一个 PPT。")
-            return
 
-        for idx in indices:
-            item = self.available_items[idx]
-            if item not in self.selected_items:
-                self.selected_items.append(item)
-                self.selected_listbox.insert(tk.END, item.display_name)
+SESSION_WORKING = "当前"  # 未运行任何模式时自动保存的工作选择
 
-    def add_all(self):
-        if not self.available_items:
-            messagebox.showinfo("提示", "当前目录没有可用的 PPT。")
-            return
-        added = False
-        for item in self.available_items:
-            if item not in self.selected_items:
-                self.selected_items.append(item)
-                self.selected_listbox.insert(tk.END, item.display_name)
-                added = True
-        if not added:
-            messagebox.showinfo("提示", "所有 PPT 已经在右侧列表中。")
 
-    def remove_selected(self):
-        idx = self.selected_listbox.curselection()
-        if not idx:
-            messagebox.showwarning("提示", "请在右侧列表中选择要移除的 PPT。")
-            return
-        pos = idx[0]
-        self.selected_listbox.delete(pos)
-        del self.selected_items[pos]
+def file_fingerprint(path: str, sample_size: int = 65536) -> str:
+    """按文件大小和首尾内容计算指纹，用于识别重命名后的同一文件（避免整文件读取）"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as src_file:
+        digest.update(src_file.read(sample_size))
+        if size > sample_size * 2:
+            src_file.seek(-sample_size, os.SEEK_END)
+            digest.update(src_file.read(sample_size))
+    return digest.hexdigest()
 
-    def clear_selected(self):
-        self.selected_listbox.delete(0, tk.END)
-        self.selected_items.clear()
 
-    def _ensure_chinese_font(self):
-        if self._font_checked:
-            return
-        self._font_checked = True
+class SessionStore:
+    """按目录和模式保存已选 PPT 及其顺序；写盘在后台线程中防抖执行"""
 
-        if canvas is None or pdfmetrics is None or TTFont is None:
-            return
+    def __init__(self, path: str, delay: float = 0.5):
+        self.path = path
+        self.delay = delay
+        self.data: dict = {"folders": {}, "fingerprints": {}}
+        self._pending: Dict[str, Dict[str, List[Tuple[str, Optional[str]]]]] = {}
+        self._deadline: Optional[float] = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        try:
+            with open(path, "r", encoding="utf-8") as session_file:
+                loaded = json.load(session_file)
+            if isinstance(loaded, dict):
+                self.data["folders"] = loaded.get("folders", {})
+                self.data["fingerprints"] = loaded.get("fingerprints", {})
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def folder_key(folder: str) -> str:
+        return os.path.normcase(os.path.abspath(folder))
+
+    def names(self, folder: str) -> List[str]:
+        key = self.folder_key(folder)
+        with self._lock:
+            names = list(self.data["folders"].get(key, {}))
+            names += [name for name in self._pending.get(key, {}) if name not in names]
+        return names
+
+    def schedule_save(self, folder: str, name: str, entries: List[Tuple[str, Optional[str]]]):
+        """记录最新选择 [(路径, 幻灯片范围)]，停止变化 delay 秒后由后台线程写盘"""
+        with self._lock:
+            self._pending.setdefault(self.folder_key(folder), {})[name] = list(entries)
+            self._deadline = time.monotonic() + self.delay
+            self._wakeup.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="session-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """同步写出所有尚未落盘的修改（退出程序前调用）"""
+        self._write_pending()
+
+    def _worker(self):
+        while True:
+            self._wakeup.wait()
+            while True:
+                with self._lock:
+                    remaining = (self._deadline or 0) - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining)
+            self._write_pending()
+
+    def _fingerprint(self, path: str) -> Optional[str]:
+        signature = _file_signature(path)
+        if signature is None:
+            return None
+        with self._lock:
+            cached = self.data["fingerprints"].get(path)
+        if cached and cached.get("sig") == signature:
+            return cached["hash"]
+        try:
+            fingerprint = file_fingerprint(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.data["fingerprints"][path] = {"sig": signature, "hash": fingerprint}
+        return fingerprint
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                self._deadline = None
+                self._wakeup.clear()
+            if not pending:
+                return
+            # 指纹在锁外计算，缓存命中时只需一次 stat
+            sessions = {
+                folder: {
+                    name: [
+                        dict(
+                            {"name": os.path.basename(path), "hash": self._fingerprint(path)},
+                            **({"slides": slides} if slides else {}),
+                        )
+                        for path, slides in entries
+                    ]
+                    for name, entries in named.items()
+                }
+                for folder, named in pending.items()
+            }
+            with self._lock:
+                for folder, named in sessions.items():
+                    self.data["folders"].setdefault(folder, {}).update(named)
+                snapshot = json.dumps(self.data, ensure_ascii=False, indent=2)
+            try:
+                atomic_write(self.path, lambda handle: handle.write(snapshot), mode="w")
+            except OSError:
+                pass
 
-        font_dir = os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")
-        candidates = [
-            ("SimSun", "simsun.ttc"),
-            ("SimHei", "simhei.ttf"),
-            ("FangSong", "simfang.ttf"),
-            ("KaiTi", "simkai.ttf"),
-            ("MicrosoftYaHei", "msyh.ttc"),
+    def resolve(self, folder: str, name: str, available_paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+        """把保存的顺序映射回当前目录中的文件，返回 [(路径, 幻灯片范围)]：先按文件名，找不到再按内容指纹"""
+        key = self.folder_key(folder)
+        with self._lock:
+            pending = self._pending.get(key, {}).get(name)
+            entries = list(self.data["folders"].get(key, {}).get(name, []))
+        if pending is not None:
+            available = set(available_paths)
+            return [(path, slides) for path, slides in pending if path in available]
+
+        by_name = {os.path.basename(path): path for path in available_paths}
+        resolved: List[Optional[str]] = []
+        used = set()
+        for entry in entries:
+            path = by_name.get(entry.get("name"))
+            if path is not None and path not in used:
+                used.add(path)
+            else:
+                path = None
+            resolved.append(path)
+
+        if None in resolved:
+            # 只有找不到同名文件时才计算其余文件的指纹
+            by_hash: Dict[str, str] = {}
+            for path in available_paths:
+                if path not in used:
+                    fingerprint = self._fingerprint(path)
+                    if fingerprint is not None:
+                        by_hash.setdefault(fingerprint, path)
+            for index, entry in enumerate(entries):
+                if resolved[index] is None:
+                    path = by_hash.get(entry.get("hash"))
+                    if path is not None and path not in used:
+                        used.add(path)
+                        resolved[index] = path
+        return [(path, entry.get("slides")) for path, entry in zip(resolved, entries) if path is not None]
+
+
+_CJK_RANGE = (0x4E00, 0x9FFF)  # CJK 统一表意文字基本区
+_CJK_MIN_COVERAGE = 3000  # 至少覆盖这么多常用汉字才视为可用的中文字体
+# 同等可用时的优先顺序（越靠前越优先）；Windows 部分沿用原来的候选列表
+_PREFERRED_CJK_FONTS = [
+    "SimSun",
+    "SimHei",
+    "FangSong",
+    "KaiTi",
+    "MicrosoftYaHei",
+    "PingFangSC-Regular",
+    "STHeitiSC-Light",
+    "HiraginoSansGB-W3",
+    "STSong",
+    "WenQuanYiMicroHei",
+    "WenQuanYiZenHei",
+    "DroidSansFallbackFull",
+    "DroidSansFallback",
+    "AR-PL-UMing-CN",
+]
+
+
+def _fontconfig_dirs() -> List[str]:
+    """读取 fontconfig 配置中的 <dir> 项；没有配置时使用常见默认目录"""
+    dirs: List[str] = []
+    xdg_data = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    conf_files = ["/etc/fonts/fonts.conf"] + sorted(glob.glob("/etc/fonts/conf.d/*.conf"))
+    for conf_path in conf_files:
+        try:
+            with open(conf_path, "r", encoding="utf-8", errors="replace") as conf_file:
+                content = conf_file.read()
+        except OSError:
+            continue
+        for attrs, value in re.findall(r"<dir([^>]*)>([^<]+)</dir>", content):
+            value = value.strip()
+            if 'prefix="xdg"' in attrs:
+                value = os.path.join(xdg_data, value)
+            dirs.append(os.path.expanduser(value))
+    if not dirs:
+        dirs = [
+            "/usr/share/fonts",
+            "/usr/local/share/fonts",
+            os.path.join(xdg_data, "fonts"),
+            os.path.expanduser("~/.fonts"),
         ]
+    return dirs
+
+
+def system_font_dirs() -> List[str]:
+    system = platform.system()
+    if system == "Windows":
+        dirs = [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts")]
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            dirs.append(os.path.join(local_app_data, "Microsoft", "Windows", "Fonts"))
+    elif system == "Darwin":
+        dirs = [
+            "/System/Library/Fonts",
+            "/Library/Fonts",
+            os.path.expanduser("~/Library/Fonts"),
+        ]
+    else:
+        dirs = _fontconfig_dirs()
+    unique: List[str] = []
+    for directory in dirs:
+        if os.path.isdir(directory) and directory not in unique:
+            unique.append(directory)
+    return unique
+
+
+def _read_sfnt_tables(font_file, offset: int) -> Dict[str, Tuple[int, int]]:
+    font_file.seek(offset)
+    header = font_file.read(12)
+    if len(header) < 12:
+        return {}
+    num_tables = struct.unpack(">H", header[4:6])[0]
+    tables: Dict[str, Tuple[int, int]] = {}
+    records = font_file.read(16 * num_tables)
+    for i in range(len(records) // 16):
+        tag, _checksum, table_offset, length = struct.unpack(">4sIII", records[i * 16:(i + 1) * 16])
+        tables[tag.decode("latin-1")] = (table_offset, length)
+    return tables
+
+
+def _read_postscript_name(font_file, tables: Dict[str, Tuple[int, int]]) -> Optional[str]:
+    if "name" not in tables:
+        return None
+    offset, length = tables["name"]
+    font_file.seek(offset)
+    data = font_file.read(length)
+    if len(data) < 6:
+        return None
+    _format, count, string_offset = struct.unpack(">HHH", data[:6])
+    for i in range(count):
+        record = data[6 + i * 12:18 + i * 12]
+        if len(record) < 12:
+            break
+        platform_id, _encoding_id, _language_id, name_id, name_length, name_offset = struct.unpack(">6H", record)
+        if name_id != 6:
+            continue
+        raw = data[string_offset + name_offset:string_offset + name_offset + name_length]
+        name = raw.decode("utf-16-be", errors="ignore") if platform_id in (0, 3) else raw.decode("latin-1")
+        name = re.sub(r"[^A-Za-z0-9_.-]", "", name)
+        if name:
+            return name
+    return None
+
+
+def _cjk_coverage(font_file, tables: Dict[str, Tuple[int, int]]) -> int:
+    """按 cmap 的区段统计覆盖 CJK 基本区的码位数（不逐个解析字形）"""
+    if "cmap" not in tables:
+        return 0
+    offset, length = tables["cmap"]
+    font_file.seek(offset)
+    data = font_file.read(length)
+    if len(data) < 4:
+        return 0
+    num_subtables = struct.unpack(">H", data[2:4])[0]
+    subtables = {}
+    for i in range(num_subtables):
+        record = data[4 + i * 8:12 + i * 8]
+        if len(record) < 8:
+            break
+        platform_id, encoding_id, sub_offset = struct.unpack(">HHI", record)
+        subtables[(platform_id, encoding_id)] = sub_offset
+
+    ranges: List[Tuple[int, int]] = []
+    for key in ((3, 10), (0, 4), (3, 1), (0, 3)):
+        if key not in subtables:
+            continue
+        sub = data[subtables[key]:]
+        cmap_format = struct.unpack(">H", sub[:2])[0]
+        if cmap_format == 12:
+            num_groups = struct.unpack(">I", sub[12:16])[0]
+            for g in range(num_groups):
+                start, end, _glyph = struct.unpack(">III", sub[16 + g * 12:28 + g * 12])
+                ranges.append((start, end))
+            break
+        if cmap_format == 4:
+            seg_count = struct.unpack(">H", sub[6:8])[0] // 2
+            ends = struct.unpack(f">{seg_count}H", sub[14:14 + seg_count * 2])
+            starts_at = 16 + seg_count * 2
+            starts = struct.unpack(f">{seg_count}H", sub[starts_at:starts_at + seg_count * 2])
+            ranges.extend(zip(starts, ends))
+            break
+
+    low, high = _CJK_RANGE
+    return sum(max(0, min(end, high) - max(start, low) + 1) for start, end in ranges)
+
+
+def read_font_faces(path: str) -> List[dict]:
+    """解析 TTF/OTF/TTC 文件，返回每个字体的 PostScript 名、子字体序号、字形类型和中文覆盖数"""
+    faces: List[dict] = []
+    stem = re.sub(r"[^A-Za-z0-9_.-]", "", os.path.splitext(os.path.basename(path))[0]) or "Font"
+    with open(path, "rb") as font_file:
+        header = font_file.read(12)
+        if header[:4] == b"ttcf":
+            num_fonts = struct.unpack(">I", header[8:12])[0]
+            offsets = list(struct.unpack(f">{num_fonts}I", font_file.read(4 * num_fonts)))
+        else:
+            offsets = [0]
+        for index, offset in enumerate(offsets):
+            tables = _read_sfnt_tables(font_file, offset)
+            if not tables:
+                continue
+            faces.append(
+                {
+                    "path": path,
+                    "index": index,
+                    "name": _read_postscript_name(font_file, tables) or f"{stem}-{index}",
+                    # reportlab 只能嵌入 TrueType 轮廓（glyf），CFF 轮廓的 OTF 无法使用
+                    "truetype": "glyf" in tables,
+                    "coverage": _cjk_coverage(font_file, tables),
+                    "size": os.path.getsize(path),
+                }
+            )
+    return faces
+
 
-        for font_name, file_name in candidates:
-            font_path = os.path.join(font_dir, file_name)
-            if not os.path.exists(font_path):
+class FontIndex:
+    """扫描系统字体目录，缓存支持中文的字体及覆盖范围；目录 mtime 不变时不再重扫"""
+
+    version = 1
+
+    def __init__(self, cache_path: str, font_dirs: Optional[List[str]] = None):
+        self.cache_path = cache_path
+        self.font_dirs = font_dirs
+        self.faces: List[dict] = []
+        self._loaded = threading.Event()
+        self._register_lock = threading.Lock()
+        self._registered: Optional[str] = None
+        self._register_attempted = False
+
+    def _load_cache(self) -> Dict[str, dict]:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as cache_file:
+                data = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        return data.get("dirs", {})
+
+    def _scan_dir(self, directory: str) -> List[dict]:
+        faces: List[dict] = []
+        try:
+            entries = os.listdir(directory)
+        except OSError:
+            return faces
+        for entry in entries:
+            if not entry.lower().endswith((".ttf", ".ttc", ".otf")):
                 continue
+            path = os.path.join(directory, entry)
             try:
-                pdfmetrics.registerFont(TTFont(font_name, font_path))
-                self.font_regular = font_name
-                self.font_bold = font_name
-                return
-            except Exception:
+                faces.extend(
+                    face
+                    for face in read_font_faces(path)
+                    if face["truetype"] and face["coverage"] >= _CJK_MIN_COVERAGE
+                )
+            except (OSError, struct.error, ValueError):
                 continue
+        return faces
 
-    def _sync_order_with_model(self, _event=None):
-        new_order: List[PPTItem] = []
-        for i in range(self.selected_listbox.size()):
-            name = self.selected_listbox.get(i)
-            match = next((item for item in self.selected_items if item.display_name == name), None)
-            if match:
-                new_order.append(match)
-        # 如果拖动后有重复或遗漏，回退到线性搜索结果
-        if len(new_order) == len(self.selected_items):
-            self.selected_items = new_order
+    def load(self) -> List[dict]:
+        """只 stat 目录；mtime 变化的目录才重新解析其中的字体文件"""
+        try:
+            self.faces = self._load_faces()
+        finally:
+            self._loaded.set()
+        return self.faces
+
+    def _load_faces(self) -> List[dict]:
+        cached = self._load_cache()
+        dirs: Dict[str, dict] = {}
+        changed = False
+        for root in self.font_dirs if self.font_dirs is not None else system_font_dirs():
+            for directory, _subdirs, _files in os.walk(root):
+                try:
+                    mtime = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                entry = cached.get(directory)
+                if entry is None or entry.get("mtime") != mtime:
+                    entry = {"mtime": mtime, "fonts": self._scan_dir(directory)}
+                    changed = True
+                dirs[directory] = entry
+        if changed or set(dirs) != set(cached):
+            try:
+                atomic_write(
+                    self.cache_path,
+                    lambda handle: json.dump({"version": self.version, "dirs": dirs}, handle, ensure_ascii=False),
+                    mode="w",
+                )
+            except OSError:
+                pass
+        return [face for entry in dirs.values() for face in entry["fonts"]]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._loaded.wait(timeout)
+
+    def register_best(self) -> Optional[str]:
+        """把排名最高且能被 reportlab 加载的中文字体注册一次，返回注册名"""
+        with self._register_lock:
+            if self._register_attempted:
+                return self._registered
+            self._register_attempted = True
+            if pdfmetrics is None or TTFont is None:
+                return None
+            # 后台线程已在启动时开始加载索引，这里只需等待其完成
+            self.wait()
+            for face in self.ranked():
+                try:
+                    pdfmetrics.registerFont(TTFont(face["name"], face["path"], subfontIndex=face["index"]))
+                except Exception:
+                    continue
+                self._registered = face["name"]
+                break
+            return self._registered
+
+    def ranked(self) -> List[dict]:
+        """按优先列表、中文覆盖数、单字体文件优先、文件大小排序"""
+
+        def rank(face: dict):
+            try:
+                preferred = _PREFERRED_CJK_FONTS.index(face["name"])
+            except ValueError:
+                preferred = len(_PREFERRED_CJK_FONTS)
+            return (preferred, -face["coverage"], face["path"].lower().endswith(".ttc"), face["size"])
 
-    def start_process(self, mode_label: str):
-        if not self.selected_items:
-            messagebox.showwarning("提示", "请先选择至少一个 PPT 文件。")
-            return
+        return sorted(self.faces, key=rank)
 
-        if not self.folder_path:
-            messagebox.showwarning("提示", "请先选择工作目录。")
-            return
 
-        if not os.path.exists(self.vbs_path):
-            messagebox.showerror("错误", f"未找到 VBS 脚本：{self.vbs_path}")
-            return
+THUMBNAIL_WIDTH = 160
 
-        if PyPDF2 is None or canvas is None or A4 is None:
-            messagebox.showerror(
-                "缺少依赖",
-                "请先安装依赖库：\n\npip install PyPDF2 reportlab",
+
+class ThumbnailCache:
+    """按 (输入文件指纹, 页序号) 缓存 PNG 缩略图，超过容量时淘汰最久未用的"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Tuple[str, int]) -> Optional[bytes]:
+        data = self._items.get(key)
+        if data is not None:
+            self._items.move_to_end(key)
+        return data
+
+    def put(self, key: Tuple[str, int], data: bytes):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._size -= len(old)
+        self._items[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes and len(self._items) > 1:
+            _old_key, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted)
+
+
+def thumbnail_renderer_available() -> bool:
+    return fitz is not None or shutil.which("pdftoppm") is not None
+
+
+def _render_thumbnails(pdf_path: str, page_indices: List[int], width: int) -> List[Tuple[int, Optional[bytes]]]:
+    """在子进程中把指定页渲染为 PNG；优先用 PyMuPDF，没有时调用 poppler 的 pdftoppm"""
+    results: List[Tuple[int, Optional[bytes]]] = []
+    if fitz is not None:
+        with fitz.open(pdf_path) as doc:
+            for index in page_indices:
+                page = doc[index]
+                zoom = width / page.rect.width
+                pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                results.append((index, pixmap.tobytes("png")))
+        return results
+
+    for index in page_indices:
+        completed = subprocess.run(
+            [
+                "pdftoppm",
+                "-f", str(index + 1),
+                "-l", str(index + 1),
+                "-png",
+                "-scale-to-x", str(width),
+                "-scale-to-y", "-1",
+                "-singlefile",
+                pdf_path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        results.append((index, completed.stdout if completed.returncode == 0 and completed.stdout else None))
+    return results
+
+
+class PagePreviewWindow:
+    """合并结果的页面缩略图条：只渲染可见页，渲染在后台进程池中进行"""
+
+    gap = 12
+    label_height = 20
+    batch_size = 4
+
+    def __init__(
+        self,
+        master,
+        pdf_path: str,
+        page_keys: List[Tuple[str, int]],
+        page_sizes: List[Tuple[float, float]],
+        cache: ThumbnailCache,
+        executor,
+        width: int = THUMBNAIL_WIDTH,
+    ):
+        self.pdf_path = pdf_path
+        self.page_keys = page_keys
+        self.cache = cache
+        self.executor = executor
+        self.width = width
+        self.slot = width + self.gap
+        self._heights = [int(width * h / w) if w else width for w, h in page_sizes]
+        strip_height = max(self._heights or [width]) + self.label_height + self.gap * 2
+
+        self.top = tk.Toplevel(master)
+        self.top.title(f"预览：{os.path.basename(pdf_path)}（共 {len(page_keys)} 页）")
+        self.top.geometry(f"900x{strip_height + 40}")
+        self.canvas = tk.Canvas(self.top, height=strip_height, background="#EEEEEE", highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.top, orient=tk.HORIZONTAL, command=self._on_scroll)
+        self.canvas.configure(
+            xscrollcommand=scrollbar.set,
+            scrollregion=(0, 0, self.gap + self.slot * len(page_keys), strip_height),
+        )
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        scrollbar.pack(fill=tk.X)
+
+        # 先画出占位框，缩略图渲染完成后再贴上去
+        for index, height in enumerate(self._heights):
+            x = self.gap + index * self.slot
+            self.canvas.create_rectangle(x, self.gap, x + width, self.gap + height, outline="#BBBBBB", fill="white")
+            self.canvas.create_text(
+                x + width // 2, self.gap + height + self.label_height // 2 + 4, text=str(index + 1)
             )
+
+        self._images: Dict[int, tk.PhotoImage] = {}
+        self._requested = set()
+        self._inflight: Dict[object, List[int]] = {}
+        self.canvas.bind("<Configure>", lambda _event: self._update_visible())
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_mousewheel)
+        self.top.bind("<Destroy>", self._on_destroy)
+        self._poll_id = self.top.after(100, self._poll)
+
+    def _on_scroll(self, *args):
+        self.canvas.xview(*args)
+        self._update_visible()
+
+    def _on_mousewheel(self, event):
+        self.canvas.xview_scroll(-1 if event.delta > 0 else 1, "units")
+        self._update_visible()
+
+    def _visible_range(self) -> Tuple[int, int]:
+        left = self.canvas.canvasx(0)
+        right = self.canvas.canvasx(self.canvas.winfo_width())
+        first = max(0, int(left // self.slot) - 1)
+        last = min(len(self.page_keys), int(right // self.slot) + 2)
+        return first, last
+
+    def _update_visible(self):
+        missing: List[int] = []
+        first, last = self._visible_range()
+        for index in range(first, last):
+            if index in self._images or index in self._requested:
+                continue
+            data = self.cache.get(self.page_keys[index])
+            if data is not None:
+                self._show(index, data)
+            else:
+                self._requested.add(index)
+                missing.append(index)
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            future = self.executor.submit(_render_thumbnails, self.pdf_path, chunk, self.width)
+            self._inflight[future] = chunk
+
+    def _poll(self):
+        for future in [f for f in self._inflight if f.done()]:
+            self._inflight.pop(future)
+            try:
+                results = future.result()
+            except Exception as exc:
+                print(f"渲染预览时出错：{exc}")
+                continue
+            for index, data in results:
+                if data:
+                    self.cache.put(self.page_keys[index], data)
+                    self._show(index, data)
+        self._poll_id = self.top.after(100, self._poll)
+
+    def _show(self, index: int, data: bytes):
+        image = tk.PhotoImage(master=self.top, data=base64.b64encode(data).decode("ascii"))
+        x = self.gap + index * self.slot
+        self.canvas.create_image(x, self.gap, anchor=tk.NW, image=image)
+        self._images[index] = image
+
+    def _on_destroy(self, event):
+        if event.widget is not self.top:
             return
+        self.top.after_cancel(self._poll_id)
+        for future in self._inflight:
+            future.cancel()
+        self._inflight.clear()
 
+
+class ConversionCache:
+    """多个任务共享的 PPT→PDF 转换结果，按源文件路径和 mtime/size 命中"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self._guard = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def _key(self, ppt_path: str, slides: Optional[str] = None) -> str:
+        identity = [os.path.normcase(os.path.abspath(ppt_path)), _file_signature(ppt_path)]
+        if slides:
+            identity.append(f"only:{slides}")  # 带范围的条目只含所选页
+        return hashlib.sha1(json.dumps(identity).encode("utf-8")).hexdigest()
+
+    def _path(self, ppt_path: str, slides: Optional[str] = None) -> str:
+        return os.path.join(self.cache_dir, self._key(ppt_path, slides) + ".pdf")
+
+    @classmethod
+    def shared(cls) -> "ConversionCache":
+        """服务、界面和归档进程共用的缓存目录"""
+        return cls(os.path.join(tempfile.gettempdir(), "ppt_merger_conversions"))
+
+    def lookup(self, ppt_path: str, slides: Optional[str] = None) -> Optional[str]:
+        path = self._path(ppt_path, slides)
         try:
-            stats = self._convert_ppts_to_pdfs()
-            if not stats:
-                return
-            output_path = self._merge_pdfs_with_toc(stats, mode_label)
-        except Exception as exc:  # pragma: no cover - GUI error display
-            messagebox.showerror("错误", f"处理过程中出现问题：\n{exc}")
-            return
+            # 命中时刷新修改时间，prune 按最近一次使用淘汰，常用的条目不会过期
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def store(self, ppt_path: str, pdf_path: str, slides: Optional[str] = None) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(ppt_path, slides)
+        with open(pdf_path, "rb") as src_file:
+            atomic_write(path, lambda dst_file: shutil.copyfileobj(src_file, dst_file, 1024 * 1024))
+        return path
+
+    @contextlib.contextmanager
+    def locked(self, ppt_paths: List[str]):
+        """同时持有多个源文件的转换锁（不区分幻灯片范围，转换器总写到同一个 PDF）；按键排序获取以避免死锁"""
+        keys = sorted({self._key(path) for path in ppt_paths})
+        with self._guard:
+            locks = [self._locks.setdefault(key, threading.Lock()) for key in keys]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
 
-        messagebox.showinfo("完成", f"合并文件已生成：\n{output_path}")
+    def prune(self, max_age_days: float = 7):
+        """删除长时间未使用的缓存文件；每次服务或归档运行开始时调用一次，不在各任务中调用"""
+        deadline = time.time() - max_age_days * 86400
+        for path in glob.glob(os.path.join(self.cache_dir, "*.pdf")):
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                pass
 
-    def merge_ppts(self):
-        """使用PowerPoint COM接口直接合并PPT文件"""
-        if not self.selected_items:
-            messagebox.showwarning("提示", "请先选择至少一个 PPT 文件。")
-            return
 
-        if not self.folder_path:
-            messagebox.showwarning("提示", "请先选择工作目录。")
-            return
+@dataclass
+class EngineContext:
+    """合并服务中所有任务共享的资源"""
+
+    script_dir: str
+    font_index: FontIndex
+    conversion_cache: ConversionCache
+    command_factory: Optional[Callable[[str, Optional[str]], List[str]]] = None  # 默认调用 VBS；测试时可换成假转换器
+    conversion_gate: Optional[Any] = None  # 归档模式下多个进程共用的转换并发上限
+
+    @classmethod
+    def create(
+        cls,
+        script_dir: str,
+        command_factory: Optional[Callable[[str, Optional[str]], List[str]]] = None,
+        conversion_gate: Optional[Any] = None,
+    ) -> "EngineContext":
+        font_index = FontIndex(os.path.join(script_dir, "ppt_merger_fonts.json"))
+        # 字体索引在后台加载，真正注册推迟到第一次生成目录页时
+        threading.Thread(target=font_index.load, name="font-index", daemon=True).start()
+        return cls(script_dir, font_index, ConversionCache.shared(), command_factory, conversion_gate)
+
+
+SLIDES_APPLIED_MARKER = "SLIDES-APPLIED"  # 转换器只导出了幻灯片范围时在标准输出中打印这一行
+
+
+def fake_converter_command(ppt_path: str, slides: Optional[str] = None) -> List[str]:
+    """测试用转换后端：调用本脚本生成占位 PDF（有幻灯片范围时只输出这些页），不需要 PowerPoint"""
+    command = [sys.executable, os.path.abspath(__file__), "--fake-convert", ppt_path]
+    if slides:
+        command += ["--fake-slides", slides]
+    return command
+
+
+def write_placeholder_pdf(pdf_path: str, pages: int = 3):
+    """不依赖第三方库写出一个只有空白页的最小 PDF"""
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>",
+    ] + ["<< /Type /Page /Parent 2 0 R /MediaBox [0 0 720 540] >>"] * pages
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("ascii")
+    xref_offset = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+    atomic_write(pdf_path, lambda handle: handle.write(body))
+
+
+class MergeEngine:
+    """不依赖界面的合并流程；每个任务一个实例，由 MergeService 的工作线程执行"""
+
+    def __init__(
+        self,
+        context: EngineContext,
+        folder_path: str,
+        items: List[PPTItem],
+        optimize_options: Optional[PDFOptimizeOptions] = None,
+        converter_options: Optional[ConverterOptions] = None,
+        staging_options: Optional[StagingOptions] = None,
+        progress: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.context = context
+        self.script_dir = context.script_dir
+        self.vbs_path = os.path.normpath(os.path.join(self.script_dir, "单个ppt转为pdf.vbs"))
+        self.journal_dir = os.path.join(self.script_dir, ".ppt_merger_runs")
+        self.font_regular = "Helvetica"
+        self.font_bold = "Helvetica-Bold"
+        self.is_windows = platform.system() == "Windows"
+        self.is_mac = platform.system() == "Darwin"
 
-        # 检查平台和依赖
-        if self.is_windows:
-            if win32com is None:
-                messagebox.showerror(
-                    "缺少依赖",
-                    "请先安装依赖库：\n\npip install pywin32",
-                )
-                return
-        elif self.is_mac:
-            # Mac 上使用 python-pptx
-            if Presentation is None:
-                messagebox.showerror(
-                    "缺少依赖",
-                    "请先安装依赖库：\n\npip install python-pptx",
-                )
-                return
-        else:
-            messagebox.showerror(
-                "不支持的操作系统",
-                f"当前操作系统 {platform.system()} 暂不支持合并PPT功能。\n请使用 Windows 或 macOS。",
+        self.folder_path = folder_path
+        self.selected_items = items
+        self.optimize_options = optimize_options or PDFOptimizeOptions()
+        self.converter_options = converter_options or ConverterOptions()
+        self.staging_options = staging_options or StagingOptions()
+        self.progress = progress or (lambda stage, message: None)
+        self.last_optimize_report: Optional[OptimizeReport] = None
+        self.last_page_keys: List[Tuple[str, int]] = []
+
+    def run_pdf(self, mode_label: str) -> dict:
+        """转换并合并为带目录的 PDF，返回输出路径、页面来源键和压缩报告"""
+        check_mode_label(mode_label)
+        if self.context.command_factory is None and not os.path.exists(self.vbs_path):
+            raise RuntimeError(f"未找到 VBS 脚本：{self.vbs_path}")
+        if PyPDF2 is None or canvas is None or A4 is None:
+            raise RuntimeError("请先安装依赖库：\n\npip install PyPDF2 reportlab")
+
+        journal = RunJournal.for_run(self.journal_dir, self.folder_path, mode_label)
+        order = [os.path.normpath(item.file_path) for item in self.selected_items]
+        # 共享盘上的目录先复制到本地暂存区，转换和合并都在本地完成
+        staging = StagingArea.for_folder(self.folder_path, self.staging_options)
+        # 上次运行已写出结果但未来得及收尾时，直接复用（幻灯片范围不同也视为不同输入）
+        output_path = journal.completed_output("merge", [item.key for item in self.selected_items])
+        page_keys: List[Tuple[str, int]] = []
+        if output_path is None:
+            items = self.selected_items
+            output_dir = None
+            if staging is not None:
+                self.progress("staging", f"正在复制 {len(order)} 个文件到本地")
+                local_paths = staging.stage(list(OrderedDict.fromkeys(order)))
+                items = [
+                    dataclasses.replace(item, file_path=local_paths[path])
+                    for item, path in zip(self.selected_items, order)
+                ]
+                output_dir = staging.output_dir
+            self.progress("convert", f"正在转换 {len(items)} 个文件")
+            stats = self._convert_ppts_to_pdfs(journal, items)
+            self.progress("merge", "正在合并 PDF")
+            output_path = self._merge_pdfs_with_toc(stats, mode_label, journal, output_dir)
+            page_keys = self.last_page_keys
+        if staging is not None and os.path.dirname(output_path) == staging.output_dir:
+            self.progress("upload", "正在上传合并结果")
+            output_path = staging.upload(
+                output_path, os.path.join(self.folder_path, os.path.basename(output_path))
             )
-            return
 
-        try:
+        self._remove_intermediate_pdfs(journal.intermediate_pdfs())
+        journal.finish()
+        return {
+            "output_path": output_path,
+            "page_keys": [list(key) for key in page_keys],
+            "optimize_summary": self.last_optimize_report.summary() if self.last_optimize_report else None,
+        }
+
+    def run_ppt(self) -> dict:
+        """合并为带目录页的 PPTX"""
+        if self.is_windows:
+            # 工作线程中使用 COM 需要先初始化
+            import pythoncom
+
+            # 合并结束时会 Quit 共享的 PowerPoint 实例，整个合并期间占住闸门，避免打断其他任务的转换
+            gate = self.context.conversion_gate
+            with gate if gate is not None else contextlib.nullcontext():
+                pythoncom.CoInitialize()
+                try:
+                    output_path = self._merge_ppts_with_com()
+                finally:
+                    pythoncom.CoUninitialize()
+        else:
             output_path = self._merge_ppts_with_com()
-            messagebox.showinfo("完成", f"合并PPT文件已生成：\n{output_path}")
-        except Exception as exc:
-            messagebox.showerror("错误", f"合并PPT过程中出现问题：\n{exc}")
+        return {"output_path": output_path}
 
     def _merge_ppts_with_com(self) -> str:
         """合并PPT文件（Windows使用COM接口，Mac使用python-pptx）"""
@@ -460,17 +1953,17 @@ class PPTMergerApp:
     def _merge_ppts_windows(self) -> str:
         """使用PowerPoint COM接口合并PPT文件（Windows）"""
         today_str = datetime.datetime.now().strftime("%Y%m%d")
-        output_name = f"{today_str}合并PPT.pptx"
-        output_path = os.path.join(self.folder_path, output_name)
-
-        # 如果文件已存在，添加序号
-        counter = 1
-        base_output_path = output_path
-        while os.path.exists(output_path):
-            name_without_ext = os.path.splitext(base_output_path)[0]
-            output_path = f"{name_without_ext}_{counter}.pptx"
-            counter += 1
+        # 原子占用输出文件名，如果文件已存在则自动添加序号
+        output_path = reserve_output_path(self.folder_path, f"{today_str}合并PPT", ".pptx")
+        try:
+            return self._merge_ppts_windows_to(output_path)
+        except BaseException:
+            release_reserved_path(output_path)
+            raise
 
+    def _merge_ppts_windows_to(self, output_path: str) -> str:
+        # PowerPoint 只能按扩展名保存，先存到同目录临时文件再原子替换占位文件
+        tmp_path = os.path.splitext(output_path)[0] + ".~tmp.pptx"
         ppt_app = win32com.client.Dispatch("PowerPoint.Application")
         # 尝试隐藏窗口，如果失败则忽略（某些版本的PowerPoint不允许隐藏）
         try:
@@ -484,20 +1977,26 @@ class PPTMergerApp:
             first_path = os.path.abspath(os.path.normpath(first_item.file_path))
             main_presentation = ppt_app.Presentations.Open(first_path, WithWindow=False)
 
+            # 主文件只保留所选范围（从后往前删除，编号不受影响）；另存为新文件，不会改动源文件
+            keep = set(first_item.slide_numbers(main_presentation.Slides.Count))
+            for i in range(main_presentation.Slides.Count, 0, -1):
+                if i not in keep:
+                    main_presentation.Slides(i).Delete()
+
             # 统计信息：用于创建目录页
             slide_counts = []
-            slide_counts.append((first_item.display_name, main_presentation.Slides.Count))
+            slide_counts.append((first_item.label, len(keep)))
 
             # 复制其他PPT的幻灯片
             for item in self.selected_items[1:]:
                 ppt_path = os.path.abspath(os.path.normpath(item.file_path))
                 source_presentation = ppt_app.Presentations.Open(ppt_path, WithWindow=False)
                 
-                slide_count = source_presentation.Slides.Count
-                slide_counts.append((item.display_name, slide_count))
+                numbers = item.slide_numbers(source_presentation.Slides.Count)
+                slide_counts.append((item.label, len(numbers)))
 
-                # 复制所有幻灯片到主文件
-                for i in range(1, slide_count + 1):
+                # 只复制所选范围内的幻灯片到主文件
+                for i in numbers:
                     source_slide = source_presentation.Slides(i)
                     source_slide.Copy()
                     # 粘贴到主文件末尾
@@ -519,12 +2018,18 @@ class PPTMergerApp:
             self._create_toc_slide(main_presentation, slide_counts)
 
             # 保存合并后的PPT
-            main_presentation.SaveAs(output_path)
+            main_presentation.SaveAs(tmp_path)
             main_presentation.Close()
+            commit_temp_file(tmp_path, output_path)
 
             return output_path
         finally:
             ppt_app.Quit()
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
 
     def _create_toc_slide(self, presentation, slide_counts: List[Tuple[str, int]]):
         """在PPT中创建目录页"""
@@ -590,60 +2095,95 @@ class PPTMergerApp:
     def _merge_ppts_mac(self) -> str:
         """使用python-pptx合并PPT文件（Mac）"""
         today_str = datetime.datetime.now().strftime("%Y%m%d")
-        output_name = f"{today_str}合并PPT.pptx"
-        output_path = os.path.join(self.folder_path, output_name)
-
-        # 如果文件已存在，添加序号
-        counter = 1
-        base_output_path = output_path
-        while os.path.exists(output_path):
-            name_without_ext = os.path.splitext(base_output_path)[0]
-            output_path = f"{name_without_ext}_{counter}.pptx"
-            counter += 1
+        # 原子占用输出文件名，如果文件已存在则自动添加序号
+        output_path = reserve_output_path(self.folder_path, f"{today_str}合并PPT", ".pptx")
+        try:
+            return self._merge_ppts_mac_to(output_path)
+        except BaseException:
+            release_reserved_path(output_path)
+            raise
 
+    def _merge_ppts_mac_to(self, output_path: str) -> str:
         # 打开第一个PPT作为主文件
         first_item = self.selected_items[0]
         first_path = os.path.abspath(os.path.normpath(first_item.file_path))
         main_presentation = Presentation(first_path)
 
+        # 主文件只保留所选范围：从幻灯片列表中移除其余幻灯片及其关系
+        keep = set(first_item.slide_numbers(len(main_presentation.slides)))
+        slide_ids = main_presentation.slides._sldIdLst
+        for number, slide_id in reversed(list(enumerate(list(slide_ids), start=1))):
+            if number not in keep:
+                main_presentation.part.drop_rel(slide_id.rId)
+                slide_ids.remove(slide_id)
+        # 保留的幻灯片重新连续命名部件，否则之后新增的 slide{n+1}.xml 会与保留的幻灯片重名
+        main_presentation.part.rename_slide_parts([slide_id.rId for slide_id in slide_ids])
+
         # 统计信息：用于创建目录页
         slide_counts = []
-        slide_counts.append((first_item.display_name, len(main_presentation.slides)))
+        slide_counts.append((first_item.label, len(keep)))
 
         # 复制其他PPT的幻灯片
         for item in self.selected_items[1:]:
             ppt_path = os.path.abspath(os.path.normpath(item.file_path))
             source_presentation = Presentation(ppt_path)
-            
-            slide_count = len(source_presentation.slides)
-            slide_counts.append((item.display_name, slide_count))
-
-            # 复制所有幻灯片到主文件
-            # 注意：python-pptx的复制功能有限，这里使用XML直接复制的方式
-            for source_slide in source_presentation.slides:
-                # 直接复制整个幻灯片的XML元素
-                import copy
-                from lxml import etree
-                
-                # 创建新幻灯片，使用源幻灯片的布局
-                slide_layout = source_slide.slide_layout
-                new_slide = main_presentation.slides.add_slide(slide_layout)
-                
-                # 复制源幻灯片的XML内容
-                source_xml = source_slide.element
-                new_xml = copy.deepcopy(source_xml)
-                
-                # 替换新幻灯片的XML
-                new_slide.element.getparent().replace(new_slide.element, new_xml)
-                new_slide.element = new_xml
+
+            numbers = item.slide_numbers(len(source_presentation.slides))
+            slide_counts.append((item.label, len(numbers)))
+
+            # 只复制所选范围内的幻灯片到主文件
+            for number in numbers:
+                self._copy_slide_pptx(source_presentation.slides[number - 1], main_presentation)
 
         # 创建目录页（插入到第一页）
         self._create_toc_slide_pptx(main_presentation, slide_counts)
 
         # 保存合并后的PPT
-        main_presentation.save(output_path)
+        atomic_write(output_path, main_presentation.save)
         return output_path
 
+    def _copy_slide_pptx(self, source_slide, presentation):
+        """
+        把幻灯片复制到主文件末尾（使用python-pptx）。
+        python-pptx 没有复制幻灯片的接口：在主文件中按同名版式新建幻灯片，再复制形状 XML；
+        图片重新加入主文件的包并改写形状中的关系编号，图表等其他内嵌部件无法复制，引用它们的形状会跳过。
+        """
+        import copy
+        from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+
+        layouts = presentation.slide_layouts
+        layout = next(
+            (layout for layout in layouts if layout.name == source_slide.slide_layout.name),
+            layouts[min(6, len(layouts) - 1)],
+        )
+        new_slide = presentation.slides.add_slide(layout)
+        sp_tree = new_slide.shapes._spTree
+        for shape in list(new_slide.shapes):
+            sp_tree.remove(shape.element)
+
+        rid_map: Dict[str, str] = {}
+        for rel in source_slide.part.rels.values():
+            if rel.is_external:
+                rid_map[rel.rId] = new_slide.part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+            elif rel.reltype == RT.IMAGE:
+                _, rid_map[rel.rId] = new_slide.part.get_or_add_image_part(io.BytesIO(rel.target_part.blob))
+
+        r_prefix = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+        for shape in source_slide.shapes:
+            element = copy.deepcopy(shape.element)
+            references = [
+                (node, attr, value)
+                for node in element.iter()
+                for attr, value in node.attrib.items()
+                if attr.startswith(r_prefix)
+            ]
+            if any(value not in rid_map for _, _, value in references):
+                print(f"跳过无法复制的形状：{shape.name}")
+                continue
+            for node, attr, value in references:
+                node.set(attr, rid_map[value])
+            sp_tree.insert_element_before(element, "p:extLst")
+
     def _create_toc_slide_pptx(self, presentation, slide_counts: List[Tuple[str, int]]):
         """在PPT中创建目录页（使用python-pptx）"""
         try:
@@ -653,6 +2193,9 @@ class PPTMergerApp:
             # 获取空白布局
             blank_layout = presentation.slide_layouts[6]  # 6 = 空白布局
             toc_slide = presentation.slides.add_slide(blank_layout)
+            # 新幻灯片总在末尾，把它在幻灯片列表中的条目移到最前
+            slide_ids = presentation.slides._sldIdLst
+            slide_ids.insert(0, slide_ids[-1])
 
             # 添加标题
             left = Inches(1)
@@ -702,112 +2245,243 @@ class PPTMergerApp:
             # 如果创建目录页失败，不影响主流程，只记录错误
             print(f"创建目录页时出错：{e}")
 
-    def _convert_ppts_to_pdfs(self) -> List[Tuple[str, str, bool]]:
-        stats: List[Tuple[str, str, bool]] = []
+    def _convert_ppts_to_pdfs(
+        self, journal: Optional[RunJournal] = None, items: Optional[List[PPTItem]] = None
+    ) -> List[Tuple[str, str, bool]]:
+        items = self.selected_items if items is None else items
+        stats_by_index: Dict[int, Tuple[str, str, bool]] = {}
+        pending: Dict[str, Tuple[PPTItem, str, str, bool]] = {}
+        cache = self.context.conversion_cache
 
-        for item in self.selected_items:
+        for index, item in enumerate(items):
             # 规范化路径，确保使用正确的路径分隔符
             ppt_path = os.path.normpath(item.file_path)
+            cached_pdf = cache.lookup(ppt_path, item.slides)
+            if cached_pdf is not None:
+                # 其他任务已转换过同一文件（源文件未变），直接使用共享缓存
+                stats_by_index[index] = (item.display_name, cached_pdf, True)
+                continue
+            if journal is not None:
+                completed = journal.completed_conversion(ppt_path, item.key)
+                if completed is not None:
+                    # 上次运行已转换且源文件未变，跳过
+                    stats_by_index[index] = (item.display_name, completed[0], completed[1])
+                    continue
+
             pdf_path = os.path.normpath(os.path.splitext(ppt_path)[0] + ".pdf")
             existed_before = os.path.exists(pdf_path)
-            
-            try:
-                self._run_vbs_conversion(ppt_path)
-            except Exception as exc:
-                raise RuntimeError(f"转换 PPT 失败：{item.display_name}\n{exc}") from exc
-
-            # 等待PDF文件生成，最多等待30秒
-            max_wait = 30
-            wait_interval = 0.5
-            waited = 0
-            check_count = 0
-            while not os.path.exists(pdf_path) and waited < max_wait:
-                time.sleep(wait_interval)
-                waited += wait_interval
-                check_count += 1
-                # 每检查10次（约5秒）刷新一次路径（防止路径缓存问题）
-                if check_count % 10 == 0:
-                    pdf_path = os.path.normpath(os.path.splitext(ppt_path)[0] + ".pdf")
-
-            if not os.path.exists(pdf_path):
-                raise RuntimeError(f"未找到转换后的 PDF 文件：{pdf_path}\n请检查PPT文件是否成功转换为PDF。")
-
-            stats.append((item.display_name, pdf_path, existed_before))
-
-        return stats
-
-    def _run_vbs_conversion(self, ppt_path: str):
+            pending[str(index)] = (item, ppt_path, pdf_path, existed_before)
+
+        # 按固定顺序占用缓存锁，避免并发任务重复转换同一文件或互相死锁
+        errors: List[Exception] = []
+        with cache.locked([entry[1] for entry in pending.values()]):
+            # 同一文件以不同幻灯片范围出现多次时，转换器都写到同一个 PDF，
+            # 因此分轮执行：每轮中每个源文件只出现一次，本轮结果存入缓存后再开始下一轮
+            rounds: List[List[Tuple[str, List[str]]]] = []
+            seen_keys = set()
+            for key, (item, ppt_path, _pdf_path, _existed_before) in list(pending.items()):
+                cached_pdf = cache.lookup(ppt_path, item.slides)
+                if cached_pdf is not None:
+                    stats_by_index[int(key)] = (item.display_name, cached_pdf, True)
+                    del pending[key]
+                    continue
+                if item.key in seen_keys:
+                    continue  # 同一文件、同一范围只转换一次，结果稍后从缓存取
+                seen_keys.add(item.key)
+                try:
+                    command = self._converter_command(ppt_path, item.slides)
+                except Exception as exc:
+                    raise RuntimeError(f"转换 PPT 失败：{item.display_name}\n{exc}") from exc
+                round_index = 0
+                while round_index < len(rounds) and any(
+                    pending[other][1] == ppt_path for other, _command in rounds[round_index]
+                ):
+                    round_index += 1
+                if round_index == len(rounds):
+                    rounds.append([])
+                rounds[round_index].append((key, command))
+
+            total = sum(len(jobs) for jobs in rounds)
+            done = [0]
+
+            def on_result(result: ConversionResult):
+                done[0] += 1
+                self.progress("convert", f"已转换 {done[0]}/{total}：{pending[result.key][0].display_name}")
+
+            supervisor = ConversionSupervisor(
+                self.converter_options,
+                cwd=os.path.dirname(os.path.abspath(self.vbs_path)),
+                gate=self.context.conversion_gate,
+            )
+            for jobs in rounds:
+                results = supervisor.run_all(jobs, on_result)
+
+                # 单个文件失败不影响其余文件：成功的先记入运行日志，最后统一报告失败项
+                for result in results:
+                    item, ppt_path, pdf_path, existed_before = pending[result.key]
+                    if not result.ok:
+                        errors.append(ConversionError(result, item.display_name))
+                        continue
+                    try:
+                        pdf_path = self._wait_for_pdf(ppt_path, pdf_path)
+                        selected_pdf = pdf_path
+                        if item.slides and SLIDES_APPLIED_MARKER not in result.last.stdout:
+                            # 转换器没有报告按范围导出，PDF 是整份文稿：先挑出所选页，缓存中只存所选页
+                            selected_pdf = self._extract_slides(pdf_path, item)
+                    except RuntimeError as exc:
+                        errors.append(exc)
+                        continue
+                    try:
+                        cache.store(ppt_path, selected_pdf, item.slides)
+                    finally:
+                        if selected_pdf != pdf_path:
+                            os.remove(selected_pdf)
+                    if not existed_before:
+                        self._remove_intermediate_pdfs([pdf_path])
+
+            for key, (item, ppt_path, _pdf_path, _existed_before) in pending.items():
+                cached_pdf = cache.lookup(ppt_path, item.slides)
+                if cached_pdf is None:
+                    continue  # 转换失败，已记入 errors
+                stats_by_index[int(key)] = (item.display_name, cached_pdf, True)
+                if journal is not None:
+                    journal.record_conversion(ppt_path, cached_pdf, True, item.key)
+
+        if errors:
+            message = "\n".join(str(exc) for exc in errors)
+            raise RuntimeError(f"转换 PPT 失败：\n{message}") from errors[0]
+
+        return [stats_by_index[index] for index in range(len(items))]
+
+    def _wait_for_pdf(self, ppt_path: str, pdf_path: str) -> str:
+        # 等待PDF文件生成，最多等待30秒
+        max_wait = 30
+        wait_interval = 0.5
+        waited = 0
+        check_count = 0
+        while not os.path.exists(pdf_path) and waited < max_wait:
+            time.sleep(wait_interval)
+            waited += wait_interval
+            check_count += 1
+            # 每检查10次（约5秒）刷新一次路径（防止路径缓存问题）
+            if check_count % 10 == 0:
+                pdf_path = os.path.normpath(os.path.splitext(ppt_path)[0] + ".pdf")
+
+        if not os.path.exists(pdf_path):
+            raise RuntimeError(f"未找到转换后的 PDF 文件：{pdf_path}\n请检查PPT文件是否成功转换为PDF。")
+        return pdf_path
+
+    def _converter_command(self, ppt_path: str, slides: Optional[str] = None) -> List[str]:
+        if self.context.command_factory is not None:
+            return self.context.command_factory(os.path.abspath(os.path.normpath(ppt_path)), slides)
+        return self._vbs_command(ppt_path, slides)
+
+    def _vbs_command(self, ppt_path: str, slides: Optional[str] = None) -> List[str]:
         """
-        调用 VBS 将 PPT 转为 PDF。
+        构造调用 VBS 将 PPT 转为 PDF 的命令，由 ConversionSupervisor 负责运行。
+        有幻灯片范围时作为第二个参数传给 VBS，支持的脚本只导出这些页并输出 SLIDES-APPLIED；
+        不支持的脚本会忽略它导出全部页，转换后再按范围挑选（见 _extract_slides）。
         """
         # 确保路径是绝对路径且规范化
         ppt_path = os.path.abspath(os.path.normpath(ppt_path))
         vbs_path = os.path.abspath(os.path.normpath(self.vbs_path))
-        
+
         if not os.path.exists(ppt_path):
             raise RuntimeError(f"PPT文件不存在：{ppt_path}")
         if not os.path.exists(vbs_path):
             raise RuntimeError(f"VBS脚本不存在：{vbs_path}")
-        
-        cmd = [
+
+        command = [
             "cscript.exe",
             "//nologo",
             vbs_path,
             ppt_path,
         ]
-        completed = subprocess.run(
-            cmd, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.PIPE, 
-            text=True, 
-            shell=False,
-            cwd=os.path.dirname(vbs_path)  # 设置工作目录为VBS脚本所在目录
-        )
-        if completed.returncode != 0:
-            error_msg = completed.stderr or completed.stdout or "cscript 返回非零退出码"
-            raise RuntimeError(f"VBS转换失败：{error_msg}")
-
-    def _merge_pdfs_with_toc(self, stats: List[Tuple[str, str, bool]], mode_label: str) -> str:
+        if slides:
+            command.append(slides)
+        return command
+
+    def _merge_pdfs_with_toc(
+        self,
+        stats: List[Tuple[str, str, bool]],
+        mode_label: str,
+        journal: Optional[RunJournal] = None,
+        output_dir: Optional[str] = None,
+    ) -> str:
+        self.last_optimize_report = None
+        self.last_page_keys = []
         today_str = datetime.datetime.now().strftime("%Y%m%d")
         base_name = f"{today_str}{mode_label}.pdf"
-        output_path = os.path.join(self.folder_path, base_name)
+        output_dir = output_dir or self.folder_path
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, base_name)
 
         pdf_infos: List[Tuple[str, str, int]] = []
-        for display_name, pdf_path, _existed_before in stats:
-            num_pages = self._count_pdf_pages(pdf_path)
-            pdf_infos.append((display_name, pdf_path, num_pages))
+        selections: List[List[Tuple[int, int]]] = []
+        for item, (_display_name, pdf_path, _existed_before) in zip(self.selected_items, stats):
+            pages = self._selected_pages(pdf_path, item)
+            selections.append(pages)
+            pdf_infos.append((item.label, pdf_path, len(pages)))
 
         toc_pdf_path = self._create_toc_pdf(pdf_infos)
         toc_dir = os.path.dirname(toc_pdf_path)
 
         try:
             writer = PyPDF2.PdfWriter()
+            # 每页按 (来源指纹, 来源内页序号) 记录，调整顺序后重新合并仍能复用预览缩略图
+            page_keys: List[Tuple[str, int]] = []
 
             with open(toc_pdf_path, "rb") as f_toc:
+                toc_key = hashlib.sha1(f_toc.read()).hexdigest()
+                f_toc.seek(0)
                 toc_reader = PyPDF2.PdfReader(f_toc)
-                for page in toc_reader.pages:
+                for index, page in enumerate(toc_reader.pages):
                     writer.add_page(page)
+                    page_keys.append((toc_key, index))
 
-            for _display_name, pdf_path, _num_pages in pdf_infos:
+            for item, (_label, pdf_path, _num_pages), pages in zip(self.selected_items, pdf_infos, selections):
+                source_key = file_fingerprint(item.file_path)
                 with open(pdf_path, "rb") as f_pdf:
                     reader = PyPDF2.PdfReader(f_pdf)
-                    for page in reader.pages:
-                        writer.add_page(page)
-
-            with open(output_path, "wb") as out_file:
-                writer.write(out_file)
+                    # 只复制选中的页；来源序号记原幻灯片序号，改动范围后缩略图仍可复用
+                    for page_index, slide_index in pages:
+                        writer.add_page(reader.pages[page_index])
+                        page_keys.append((source_key, slide_index))
+            self.last_page_keys = page_keys
+
+            if self.optimize_options.enabled:
+                # 先写出未压缩的合并结果，再由压缩阶段生成最终文件
+                merged_path = os.path.join(toc_dir, "merged.pdf")
+                with open(merged_path, "wb") as out_file:
+                    writer.write(out_file)
+                self.last_optimize_report = optimize_pdf(merged_path, output_path, self.optimize_options)
+            else:
+                atomic_write(output_path, writer.write)
+            if journal is not None:
+                journal.mark_stage("merge", [item.key for item in self.selected_items], output_path)
         finally:
             shutil.rmtree(toc_dir, ignore_errors=True)
-            for _display_name, pdf_path, existed_before in stats:
-                if not existed_before and os.path.exists(pdf_path):
-                    try:
-                        os.remove(pdf_path)
-                    except OSError:
-                        pass
+            # 有运行日志时，中间 PDF 留到整个运行完成后再清理，以便失败后续跑
+            if journal is None:
+                self._remove_intermediate_pdfs(
+                    [pdf_path for _display_name, pdf_path, existed_before in stats if not existed_before]
+                )
 
         return output_path
 
+    def _remove_intermediate_pdfs(self, pdf_paths: List[str]):
+        for pdf_path in pdf_paths:
+            if os.path.exists(pdf_path):
+                try:
+                    os.remove(pdf_path)
+                except OSError:
+                    pass
+
     def _create_toc_pdf(self, pdf_infos: List[Tuple[str, str, int]]) -> str:
+        font_name = self.context.font_index.register_best()
+        if font_name:
+            self.font_regular = font_name
+            self.font_bold = font_name
         tmp_dir = tempfile.mkdtemp(prefix="ppt_toc_")
         toc_pdf_path = os.path.join(tmp_dir, "toc.pdf")
         try:
@@ -855,13 +2529,1411 @@ class PPTMergerApp:
             shutil.rmtree(tmp_dir, ignore_errors=True)
             raise
 
+    def _selected_pages(self, pdf_path: str, item: PPTItem) -> List[Tuple[int, int]]:
+        """返回 [(PDF 内页序号, 原幻灯片序号)]，均从 0 开始。
+        转换结果只含所选页（见 _convert_ppts_to_pdfs），逐页对应；超出文稿末尾的编号没有对应页。"""
+        pages = self._count_pdf_pages(pdf_path)
+        numbers = parse_slide_range(item.slides) or list(range(1, pages + 1))
+        return [(index, number - 1) for index, number in enumerate(numbers[:pages])]
+
+    def _extract_slides(self, pdf_path: str, item: PPTItem) -> str:
+        """从整份文稿的 PDF 中按幻灯片编号挑出所选页，写入临时文件并返回其路径"""
+        with open(pdf_path, "rb") as f_pdf:
+            reader = PyPDF2.PdfReader(f_pdf)
+            writer = PyPDF2.PdfWriter()
+            for number in item.slide_numbers(len(reader.pages)):
+                writer.add_page(reader.pages[number - 1])
+            fd, tmp_path = tempfile.mkstemp(prefix="ppt_merger_slides_", suffix=".pdf")
+            with os.fdopen(fd, "wb") as out_file:
+                writer.write(out_file)
+        return tmp_path
+
     def _count_pdf_pages(self, pdf_path: str) -> int:
         with open(pdf_path, "rb") as f_pdf:
             reader = PyPDF2.PdfReader(f_pdf)
             return len(reader.pages)
 
 
-def main():
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+SERVICE_TOKEN_NAME = "ppt_merger_service.token"
+SERVICE_TOKEN_HEADER = "X-Merger-Token"
+SERVICE_IDLE_EXIT = 1800.0  # 界面自动启动的服务没有任务、半小时无请求后退出
+
+
+def check_mode_label(mode_label: str):
+    """模式名直接拼进输出文件名，不允许包含路径分隔符或 ..，避免写到目录之外"""
+    if not isinstance(mode_label, str) or not mode_label.strip():
+        raise ValueError("模式名不能为空")
+    if re.search(r'[\\/:*?"<>|\x00-\x1f]', mode_label) or ".." in mode_label:
+        raise ValueError(f"模式名不能包含路径分隔符或特殊字符：{mode_label}")
+
+
+def load_service_token(script_dir: str) -> str:
+    """读取服务口令；不存在时生成随机口令并写入仅本人可读（0600）的文件"""
+    path = os.path.join(script_dir, SERVICE_TOKEN_NAME)
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+    except FileExistsError:
+        with open(path, "r", encoding="utf-8") as token_file:
+            token = token_file.read().strip()
+        if token:
+            return token
+        # 空文件（上次写入中断）：重新生成
+        os.remove(path)
+        return load_service_token(script_dir)
+    token = secrets.token_hex(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as token_file:
+        token_file.write(token)
+    return token
+
+
+class MergeJob:
+    def __init__(self, spec: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.state = "queued"
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.events: List[dict] = []
+        self.finished_at: Optional[float] = None
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ("done", "failed")
+
+    def emit(self, event_type: str, **payload):
+        with self.condition:
+            event = {"seq": len(self.events), "type": event_type, "time": time.time(), **payload}
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def snapshot(self) -> dict:
+        with self.condition:
+            return {
+                "id": self.id,
+                "kind": self.spec.get("kind"),
+                "state": self.state,
+                "result": self.result,
+                "error": self.error,
+                "events": len(self.events),
+            }
+
+
+class MergeService:
+    """本地合并服务：任务排队后由有界线程池执行，所有任务共享转换缓存和字体索引"""
+
+    def __init__(self, context: EngineContext, workers: int = 2, retention: float = 3600.0, max_jobs: int = 200):
+        if context.conversion_gate is None:
+            # 多个任务并发时 PowerPoint 仍只能同时做一件事：转换和 COM 合并共用同一个闸门
+            context.conversion_gate = threading.BoundedSemaphore(1)
+        self.context = context
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="merge-job")
+        self._jobs: Dict[str, MergeJob] = {}
+        self._lock = threading.Lock()
+        self.retention = retention
+        self.max_jobs = max(1, max_jobs)
+        self._last_active = time.time()
+
+    def submit(self, spec: dict) -> str:
+        if not isinstance(spec, dict):
+            raise ValueError("任务必须是 JSON 对象")
+        kind = spec.get("kind")
+        if kind not in ("pdf", "ppt"):
+            raise ValueError(f"未知的任务类型：{kind}")
+        if not isinstance(spec.get("folder"), str) or not spec["folder"]:
+            raise ValueError("任务缺少 folder")
+        items = spec.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValueError("任务缺少 items")
+        for item in items:
+            if not (
+                isinstance(item, dict)
+                and isinstance(item.get("display_name"), str)
+                and isinstance(item.get("file_path"), str)
+            ):
+                raise ValueError("items 中的每一项都必须包含 display_name 和 file_path")
+            parse_slide_range(item.get("slides"))  # 范围写法有误时在提交时就拒绝
+        if kind == "pdf":
+            check_mode_label(spec.get("mode_label") or "合并")
+        if spec.get("pdf_optimize") is not None:
+            if not isinstance(spec["pdf_optimize"], dict):
+                raise ValueError("pdf_optimize 必须是 JSON 对象")
+            PDFOptimizeOptions.from_dict(spec["pdf_optimize"]).validate()
+        job = MergeJob(spec)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict_finished()
+        job.emit("queued")
+        self._executor.submit(self._run_job, job)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[MergeJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[dict]:
+        with self._lock:
+            self._evict_finished()
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def touch(self):
+        """记录一次客户端请求，用于判断服务是否空闲"""
+        with self._lock:
+            self._last_active = time.time()
+
+    def idle_seconds(self) -> Optional[float]:
+        """有任务未结束时返回 None，否则返回距最近一次请求或任务结束的秒数"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+            last_active = self._last_active
+        if any(not job.finished for job in jobs):
+            return None
+        return time.time() - max([last_active] + [job.finished_at for job in jobs if job.finished_at is not None])
+
+    def _evict_finished(self):
+        """丢弃结束超过保留期的任务；任务数仍超过上限时从最早结束的开始丢弃（调用方持有 _lock）"""
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at is not None), key=lambda job: job.finished_at
+        )
+        for job in finished:
+            if now - job.finished_at > self.retention or len(self._jobs) > self.max_jobs:
+                del self._jobs[job.id]
+
+    def _run_job(self, job: MergeJob):
+        spec = job.spec
+        with job.condition:
+            job.state = "running"
+        job.emit("started")
+        try:
+            # 转换器和暂存目录等会启动进程或写任意位置的设置只读服务端自己的配置，不接受请求中的值
+            settings = load_settings(os.path.join(self.context.script_dir, "ppt_merger_settings.json"))
+            engine = MergeEngine(
+                self.context,
+                spec["folder"],
+                [
+                    PPTItem(display_name=item["display_name"], file_path=item["file_path"], slides=item.get("slides"))
+                    for item in spec["items"]
+                ],
+                optimize_options=PDFOptimizeOptions.from_dict(spec.get("pdf_optimize")),
+                converter_options=ConverterOptions.from_dict(settings.get("converter")),
+                staging_options=StagingOptions.from_dict(settings.get("staging")),
+                progress=lambda stage, message: job.emit("progress", stage=stage, message=message),
+            )
+            if spec["kind"] == "pdf":
+                result = engine.run_pdf(spec.get("mode_label") or "合并")
+            else:
+                result = engine.run_ppt()
+        except Exception as exc:
+            with job.condition:
+                job.state = "failed"
+                job.error = str(exc)
+                job.finished_at = time.time()
+            job.emit("failed", error=str(exc))
+            return
+        with job.condition:
+            job.state = "done"
+            job.result = result
+            job.finished_at = time.time()
+        job.emit("done", result=result)
+
+    def iter_events(self, job: MergeJob, since: int = 0, keepalive: float = 15.0) -> Iterator[dict]:
+        """依次产出任务事件，直到任务结束；长时间无事件时产出心跳"""
+        index = since
+        while True:
+            with job.condition:
+                if index >= len(job.events) and not job.finished:
+                    job.condition.wait(keepalive)
+                pending = job.events[index:]
+                finished = job.finished
+            if not pending and not finished:
+                yield {"type": "keepalive"}
+            for event in pending:
+                yield event
+            index += len(pending)
+            if finished and index >= len(job.events):
+                return
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+class _ServiceRequestHandler(BaseHTTPRequestHandler):
+    """POST /jobs 提交任务；GET /jobs、/jobs/<id>；GET /jobs/<id>/events 以 NDJSON 流式返回进度。
+    每个请求都必须带口令头；浏览器发起的请求（带 Origin）和非 JSON 的提交一律拒绝。"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "PPTMergerService/1"
+
+    @property
+    def service(self) -> MergeService:
+        return self.server.service
+
+    def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+        pass
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _reject(self, status: int, message: str) -> bool:
+        # 请求体可能未读完，拒绝后关闭连接，避免残留数据被当成下一个请求
+        self.close_connection = True
+        self._send_json(status, {"error": message})
+        return False
+
+    def _authorized(self, require_json: bool = False) -> bool:
+        if self.headers.get("Origin") is not None:
+            return self._reject(403, "不接受浏览器发起的请求")
+        token = self.headers.get(SERVICE_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            return self._reject(401, "口令错误")
+        if require_json:
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                return self._reject(415, "只接受 application/json")
+        self.service.touch()
+        return True
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["health"]:
+            self._send_json(200, {"ok": True, "pid": os.getpid()})
+            return
+        if parts == ["jobs"]:
+            self._send_json(200, self.service.jobs())
+            return
+        job = self.service.get(parts[1]) if len(parts) >= 2 and parts[0] == "jobs" else None
+        if job is None:
+            self._send_json(404, {"error": "not found"})
+            return
+        if len(parts) == 2:
+            self._send_json(200, job.snapshot())
+            return
+        if len(parts) == 3 and parts[2] == "events":
+            since = int(parse_qs(url.query).get("since", ["0"])[0])
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for event in self.service.iter_events(job, since):
+                    self._write_chunk(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._authorized(require_json=True):
+            return
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            spec = json.loads(self.rfile.read(length).decode("utf-8"))
+            job_id = self.service.submit(spec)
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        self._send_json(202, {"id": job_id})
+
+
+def start_service_server(
+    service: MergeService, token: str, host: str = SERVICE_HOST, port: int = SERVICE_PORT
+) -> ThreadingHTTPServer:
+    """在后台线程中启动 HTTP 服务；port 为 0 时由系统分配端口"""
+    server = ThreadingHTTPServer((host, port), _ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.token = token
+    threading.Thread(target=server.serve_forever, name="merge-service", daemon=True).start()
+    return server
+
+
+class ServiceClient:
+    """通过 HTTP 访问本地合并服务"""
+
+    def __init__(self, base_url: str, token: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Content-Type": "application/json", SERVICE_TOKEN_HEADER: self.token}
+
+    def _request(self, method: str, path: str, payload: Optional[dict] = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=self._headers())
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            detail = exc.read().decode("utf-8", errors="replace")
+            try:
+                detail = json.loads(detail).get("error", detail)
+            except ValueError:
+                pass
+            raise RuntimeError(f"合并服务返回错误：{detail}") from exc
+
+    def ping(self) -> bool:
+        try:
+            return bool(self._request("GET", "/health").get("ok"))
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def submit(self, spec: dict) -> str:
+        return self._request("POST", "/jobs", spec)["id"]
+
+    def status(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def events(self, job_id: str, since: int = 0) -> Iterator[dict]:
+        """逐条读取任务事件流，直到任务完成或失败"""
+        request = urllib.request.Request(
+            f"{self.base_url}/jobs/{job_id}/events?since={since}", headers=self._headers()
+        )
+        with urllib.request.urlopen(request) as response:
+            for line in response:
+                line = line.strip()
+                if line:
+                    yield json.loads(line.decode("utf-8"))
+
+
+def launch_service_process(
+    script_dir: str, host: str, port: int, workers: int, idle_exit: float = SERVICE_IDLE_EXIT
+) -> subprocess.Popen:
+    """以独立的 --serve 进程启动合并服务，不随启动它的窗口退出"""
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--script-dir", script_dir,
+        "--host", host, "--port", str(port), "--workers", str(workers), "--idle-exit", str(idle_exit),
+    ]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(
+        command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, close_fds=True, **kwargs
+    )
+
+
+def connect_service(
+    script_dir: str,
+    host: str = SERVICE_HOST,
+    port: int = SERVICE_PORT,
+    workers: int = 2,
+    idle_exit: float = SERVICE_IDLE_EXIT,
+    start_timeout: float = 15.0,
+) -> ServiceClient:
+    """
+    连接本机已运行的合并服务；没有时启动一个独立的服务进程。
+    服务若寄宿在第一个窗口中，关闭该窗口会中断其他窗口提交的任务，因此总是单独运行，空闲一段时间后自行退出。
+    """
+    token = load_service_token(script_dir)
+    client = ServiceClient(f"http://{host}:{port}", token)
+    if client.ping():
+        return client
+    try:
+        process: Optional[subprocess.Popen] = launch_service_process(script_dir, host, port, workers, idle_exit)
+    except OSError:
+        process = None
+    deadline = time.monotonic() + start_timeout
+    while process is not None and time.monotonic() < deadline:
+        if client.ping():
+            return client
+        if process.poll() is not None:
+            # 启动失败（多半是端口已被占用）：可能是另一个窗口的服务抢先启动了，再等它片刻
+            deadline = min(deadline, time.monotonic() + 3.0)
+        time.sleep(0.2)
+    if process is not None and process.poll() is None:
+        process.kill()
+    # 端口被其他程序占用或无法启动进程：在当前进程内用系统分配的端口启动，其他窗口找不到它，只供本窗口使用
+    service = MergeService(EngineContext.create(script_dir), workers=workers)
+    service.context.conversion_cache.prune()
+    server = start_service_server(service, token, host, 0)
+    return ServiceClient(f"http://{host}:{server.server_address[1]}", token)
+
+
+def _shutdown_when_idle(server: ThreadingHTTPServer, service: MergeService, idle_exit: float):
+    while True:
+        time.sleep(min(idle_exit, 30.0))
+        idle = service.idle_seconds()
+        if idle is not None and idle >= idle_exit:
+            server.shutdown()
+            return
+
+
+def serve_forever(
+    script_dir: str,
+    host: str,
+    port: int,
+    workers: int,
+    fake_converter: bool = False,
+    idle_exit: Optional[float] = None,
+):
+    """运行合并服务直到中断；设置了 idle_exit 时，没有任务且这么多秒内没有请求后退出"""
+    command_factory = fake_converter_command if fake_converter else None
+    service = MergeService(EngineContext.create(script_dir, command_factory), workers=workers)
+    service.context.conversion_cache.prune()
+    server = ThreadingHTTPServer((host, port), _ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.token = load_service_token(script_dir)
+    print(f"合并服务已启动：http://{host}:{server.server_address[1]}", flush=True)
+    print(f"请求需带 {SERVICE_TOKEN_HEADER} 头，口令见 {os.path.join(script_dir, SERVICE_TOKEN_NAME)}", flush=True)
+    if idle_exit:
+        threading.Thread(
+            target=_shutdown_when_idle, args=(server, service, idle_exit), name="idle-exit", daemon=True
+        ).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+ARCHIVE_ORDER_FILES = ("order.txt", "顺序.txt")
+ARCHIVE_STATE_NAME = ".ppt_merger_archive.json"
+ARCHIVE_INDEX_STEM = "归档目录"
+
+
+def load_settings(config_path: str) -> dict:
+    """读取界面保存的设置；文件不存在或损坏时返回空字典"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as cfg_file:
+            data = json.load(cfg_file)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def natural_sort_key(name: str) -> List:
+    """自然排序：第2周 排在 第10周 之前"""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", name)]
+
+
+def _is_ppt_file(name: str) -> bool:
+    # PowerPoint 打开文件时生成的 ~$ 锁文件不算输入
+    return name.lower().endswith((".ppt", ".pptx")) and not name.startswith("~$")
+
+
+def archive_folder_items(folder: str) -> List[PPTItem]:
+    """目录中有顺序文件时只取其中列出的文件（每行一个文件名，不匹配的行忽略）并按其顺序，否则按自然排序取全部。
+    文件名后可跟空格和幻灯片范围，如 "论文精读.pptx 5-20"，只合并这些页。"""
+    names = [
+        entry
+        for entry in os.listdir(folder)
+        if _is_ppt_file(entry) and os.path.isfile(os.path.join(folder, entry))
+    ]
+    for order_name in ARCHIVE_ORDER_FILES:
+        order_path = os.path.join(folder, order_name)
+        if not os.path.isfile(order_path):
+            continue
+        with open(order_path, "r", encoding="utf-8-sig") as order_file:
+            lines = [line.strip() for line in order_file]
+        available = set(names)
+        entries: List[Tuple[str, Optional[str]]] = []
+        for line in lines:
+            name, slides = line, None
+            if name not in available and " " in line:
+                # 文件名本身可能含空格，只有整行匹配不到文件时才拆出末尾的范围
+                name, slides = line.rsplit(None, 1)
+            if name in available:
+                try:
+                    parse_slide_range(slides)
+                except ValueError as exc:
+                    raise ValueError(f"{order_path}：{exc}") from exc
+                entries.append((name, slides))
+        break
+    else:
+        entries = [(name, None) for name in sorted(names, key=natural_sort_key)]
+    return [
+        PPTItem(display_name=name, file_path=os.path.join(folder, name), slides=slides) for name, slides in entries
+    ]
+
+
+def discover_archive_folders(root: str) -> List[Tuple[str, List[PPTItem]]]:
+    """遍历目录树，直接包含 PPT 文件的每个目录作为一个合并任务；跳过隐藏目录"""
+    folders: List[Tuple[str, List[PPTItem]]] = []
+    for dirpath, dirnames, _filenames in os.walk(root):
+        dirnames[:] = sorted((name for name in dirnames if not name.startswith(".")), key=natural_sort_key)
+        items = archive_folder_items(dirpath)
+        if items:
+            folders.append((dirpath, items))
+    return folders
+
+
+def archive_manifest(items: List[PPTItem], mode_label: str, settings: dict) -> str:
+    """输入清单摘要：文件顺序、mtime/size 和影响输出的选项都不变时可跳过该目录"""
+    manifest = [
+        mode_label,
+        settings.get("pdf_optimize"),
+        [[item.display_name, item.slides, _file_signature(item.file_path)] for item in items],
+    ]
+    return hashlib.sha1(json.dumps(manifest, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+_ARCHIVE_CONTEXT: Optional[EngineContext] = None
+
+
+def _archive_worker_init(script_dir: str, gate, fake_converter: bool):
+    """归档工作进程的初始化：每个进程一份共享资源，转换并发由 gate 跨进程限制"""
+    global _ARCHIVE_CONTEXT
+    command_factory = fake_converter_command if fake_converter else None
+    _ARCHIVE_CONTEXT = EngineContext.create(script_dir, command_factory, gate)
+
+
+def _run_archive_folder(folder: str, items: List[PPTItem], mode_label: str, settings: dict) -> dict:
+    engine = MergeEngine(
+        _ARCHIVE_CONTEXT,
+        folder,
+        items,
+        optimize_options=PDFOptimizeOptions.from_dict(settings.get("pdf_optimize")),
+        converter_options=ConverterOptions.from_dict(settings.get("converter")),
+        staging_options=StagingOptions.from_dict(settings.get("staging")),
+    )
+    result = engine.run_pdf(mode_label)
+    return {
+        "output_path": result["output_path"],
+        "pages": engine._count_pdf_pages(result["output_path"]),
+        "optimize_summary": result["optimize_summary"],
+    }
+
+
+def write_archive_index(root: str, entries: List[Tuple[str, dict]], font_name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """写出总目录 JSON 和 PDF；PDF 中每一行链接到对应的合并文件（相对路径，整个目录树可整体移动）"""
+    generated = datetime.datetime.now().isoformat(timespec="seconds")
+    index = {
+        "root": root,
+        "generated": generated,
+        "folders": [
+            dict(entry, folder=rel, output=os.path.relpath(entry["output_path"], root).replace(os.sep, "/"))
+            if entry.get("output_path")
+            else dict(entry, folder=rel)
+            for rel, entry in entries
+        ],
+    }
+    json_path = os.path.join(root, ARCHIVE_INDEX_STEM + ".json")
+    atomic_write(json_path, lambda index_file: json.dump(index, index_file, ensure_ascii=False, indent=2), mode="w")
+    if canvas is None or A4 is None:
+        return json_path, None
+
+    pdf_path = os.path.join(root, ARCHIVE_INDEX_STEM + ".pdf")
+    title_font = font_name or "Helvetica-Bold"
+    content_font = font_name or "Helvetica"
+
+    def draw(index_file):
+        c = canvas.Canvas(index_file, pagesize=A4)
+        width, height = A4
+        c.setFont(title_font, 28)
+        c.drawString(72, height - 72, f"{ARCHIVE_INDEX_STEM}：{os.path.basename(os.path.normpath(root))}")
+        c.setFont(content_font, 10)
+        c.drawString(72, height - 92, generated)
+        y = height - 130
+        line_height = 22
+        for idx, item in enumerate(index["folders"], start=1):
+            if y < 72:
+                c.showPage()
+                y = height - 72
+            c.setFont(content_font, 14)
+            if item.get("output"):
+                c.drawString(72, y, f"{idx}. {item['folder']}  页数: {item['pages']}")
+                c.linkURL(quote(item["output"]), (72, y - 4, width - 72, y + 14), relative=0)
+            else:
+                c.drawString(72, y, f"{idx}. {item['folder']}  合并失败")
+            y -= line_height
+        c.save()
+
+    atomic_write(pdf_path, draw)
+    return json_path, pdf_path
+
+
+def _remove_stale_output(previous_output: Optional[str], output_path: str, folder: str, log: Callable[[str], None]):
+    """重建成功后删除上一次带旧日期的合并结果；只删该目录下的 PDF，清单被改过也不会误删别处的文件"""
+    if not previous_output or not previous_output.lower().endswith(".pdf"):
+        return
+    previous_output = os.path.abspath(previous_output)
+    if os.path.normcase(previous_output) == os.path.normcase(os.path.abspath(output_path)):
+        return
+    if os.path.normcase(os.path.dirname(previous_output)) != os.path.normcase(os.path.abspath(folder)):
+        return
+    try:
+        os.remove(previous_output)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        log(f"无法删除旧的合并结果 {previous_output}：{exc}")
+
+
+def run_archive(
+    root: str,
+    script_dir: str,
+    mode_label: str = "合并",
+    workers: int = 2,
+    max_conversions: int = 1,
+    force: bool = False,
+    fake_converter: bool = False,
+    log: Callable[[str], None] = print,
+) -> dict:
+    """归档模式：每个子目录合并为一个 PDF，多进程并行，最后生成总目录；输入清单未变的目录直接跳过"""
+    check_mode_label(mode_label)
+    root = os.path.abspath(root)
+    settings = load_settings(os.path.join(script_dir, "ppt_merger_settings.json"))
+    state_path = os.path.join(root, ARCHIVE_STATE_NAME)
+    state = load_settings(state_path).get("folders", {})
+
+    entries: Dict[str, dict] = {}
+    pending: List[Tuple[str, str, List[PPTItem], str]] = []
+    for folder, items in discover_archive_folders(root):
+        rel = os.path.relpath(folder, root).replace(os.sep, "/")
+        manifest = archive_manifest(items, mode_label, settings)
+        previous = state.get(rel)
+        if (
+            not force
+            and previous
+            and previous.get("manifest") == manifest
+            and os.path.exists(previous.get("output_path", ""))
+        ):
+            log(f"跳过（未变化）：{rel}")
+            entries[rel] = previous
+            continue
+        pending.append((rel, folder, items, manifest))
+
+    failed: List[str] = []
+    if pending:
+        # 清理过期缓存只在主进程做一次，避免工作进程删掉其他进程刚命中的条目
+        ConversionCache.shared().prune()
+        # 所有工作进程共用一个信号量，PowerPoint 同一时刻只被有限个转换占用
+        gate = multiprocessing.BoundedSemaphore(max(1, max_conversions))
+        with ProcessPoolExecutor(
+            max_workers=max(1, min(workers, len(pending))),
+            initializer=_archive_worker_init,
+            initargs=(script_dir, gate, fake_converter),
+        ) as pool:
+            futures = {
+                pool.submit(_run_archive_folder, folder, items, mode_label, settings): (rel, folder, items, manifest)
+                for rel, folder, items, manifest in pending
+            }
+            for future in as_completed(futures):
+                rel, folder, items, manifest = futures[future]
+                names = [item.label for item in items]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    log(f"失败：{rel}\n{exc}")
+                    failed.append(rel)
+                    entries[rel] = {"items": names, "error": str(exc)}
+                    continue
+                log(f"完成：{rel} → {os.path.basename(result['output_path'])}")
+                previous_output = (state.get(rel) or {}).get("output_path")
+                entries[rel] = dict(result, items=names, manifest=manifest)
+                state[rel] = entries[rel]
+                # 每完成一个目录就保存清单，中断后重跑不会重复已完成的目录
+                atomic_write(
+                    state_path,
+                    lambda state_file: json.dump({"folders": state}, state_file, ensure_ascii=False, indent=2),
+                    mode="w",
+                )
+                _remove_stale_output(previous_output, result["output_path"], folder, log)
+
+    ordered = sorted(entries.items(), key=lambda pair: natural_sort_key(pair[0]))
+    font_index = FontIndex(os.path.join(script_dir, "ppt_merger_fonts.json"))
+    font_index.load()
+    font_name = font_index.register_best()
+    json_path, pdf_path = write_archive_index(root, ordered, font_name)
+    return {
+        "index_json": json_path,
+        "index_pdf": pdf_path,
+        "built": len(pending) - len(failed),
+        "skipped": len(entries) - len(pending),
+        "failed": failed,
+    }
+
+
+class DraggableListbox(tk.Listbox):
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self._dragging = False
+        self._drag_start_index: Optional[int] = None
+        self.bind("<ButtonPress-1>", self._on_button_press)
+        self.bind("<ButtonRelease-1>", self._on_button_release)
+        self.bind("<B1-Motion>", self._on_motion)
+
+    def _on_button_press(self, event):
+        self._dragging = True
+        self._drag_start_index = self.nearest(event.y)
+
+    def _on_motion(self, event):
+        if not self._dragging or self._drag_start_index is None:
+            return
+        new_index = self.nearest(event.y)
+        if new_index == self._drag_start_index or new_index < 0:
+            return
+        item_text = self.get(self._drag_start_index)
+        self.delete(self._drag_start_index)
+        self.insert(new_index, item_text)
+        self.selection_clear(0, tk.END)
+        self.selection_set(new_index)
+        self._drag_start_index = new_index
+        self.event_generate("<<ListboxReordered>>")
+
+    def _on_button_release(self, _event):
+        self._dragging = False
+        self._drag_start_index = None
+
+
+class PPTMergerApp:
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.root.title("PPT 转 PDF 合并工具")
+        self.root.minsize(780, 460)
+
+        ttkb_window_cls = getattr(ttkb, "Window", None)
+        self.use_bootstrap = ttkb_window_cls is not None and isinstance(self.root, ttkb_window_cls)
+        self.style = ttk.Style(self.root)
+        self._style_map = {
+            "success": "Success.TButton",
+            "primary": "Primary.TButton",
+            "info": "Info.TButton",
+            "secondary": "Secondary.TButton",
+        }
+        self._configure_styles()
+
+        self.script_dir = os.path.abspath(os.path.dirname(sys.argv[0] or __file__))
+        self.vbs_path = os.path.normpath(os.path.join(self.script_dir, "单个ppt转为pdf.vbs"))
+        self.config_path = os.path.join(self.script_dir, "ppt_merger_settings.json")
+        self.session_store = SessionStore(os.path.join(self.script_dir, "ppt_merger_sessions.json"))
+        self.is_windows = platform.system() == "Windows"
+        self.is_mac = platform.system() == "Darwin"
+
+        self.folder_path: Optional[str] = None
+        self.available_items: List[PPTItem] = []
+        self.selected_items: List[PPTItem] = []
+        self.optimize_options = PDFOptimizeOptions()
+        self.converter_options = ConverterOptions()
+        self.staging_options = StagingOptions()
+        self.last_output: Optional[Tuple[str, List[Tuple[str, int]]]] = None
+        self.thumbnail_cache = ThumbnailCache()
+        self._render_pool: Optional[ProcessPoolExecutor] = None
+        # 实际的转换与合并由本地合并服务执行，界面只提交任务并显示进度
+        self.service = connect_service(self.script_dir)
+
+        self._build_ui()
+        self._load_last_state()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        self.session_store.flush()
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=False)
+        self.root.destroy()
+
+    def _build_ui(self):
+        outer = ttk.Frame(self.root, padding=(12, 12))
+        outer.pack(fill=tk.BOTH, expand=True)
+
+        chooser_frame = ttk.Frame(outer)
+        chooser_frame.pack(fill=tk.X)
+
+        ttk.Label(chooser_frame, text="当前目录：").pack(side=tk.LEFT)
+        self.folder_var = tk.StringVar(value="尚未选择")
+        folder_entry = ttk.Entry(chooser_frame, textvariable=self.folder_var, state="readonly")
+        folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 8))
+
+        self._create_button(chooser_frame, text="选择目录", command=self.choose_folder, bootstyle="primary").pack(
+            side=tk.LEFT
+        )
+
+        ttk.Label(chooser_frame, text="已保存顺序：").pack(side=tk.LEFT, padx=(12, 0))
+        self.session_var = tk.StringVar(value="")
+        self.session_combo = ttk.Combobox(chooser_frame, textvariable=self.session_var, state="readonly", width=18)
+        self.session_combo.pack(side=tk.LEFT, padx=(4, 0))
+        self.session_combo.bind("<<ComboboxSelected>>", self._on_session_selected)
+
+        lists_frame = ttk.Frame(outer)
+        lists_frame.pack(fill=tk.BOTH, expand=True, pady=12)
+
+        # 可选列表
+        left_frame = ttk.Frame(lists_frame)
+        left_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        ttk.Label(left_frame, text="可选 PPT 文件").pack()
+        self.available_listbox = tk.Listbox(left_frame, selectmode=tk.EXTENDED)
+        self.available_listbox.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+
+        # 中间按钮
+        middle_frame = ttk.Frame(lists_frame)
+        middle_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10)
+        self._create_button(middle_frame, text="全选 →", command=self.add_all, bootstyle="secondary").pack(
+            pady=6, fill=tk.X
+        )
+        self._create_button(middle_frame, text="添加 →", command=self.add_selected, bootstyle="primary").pack(
+            pady=6, fill=tk.X
+        )
+        self._create_button(middle_frame, text="← 移除", command=self.remove_selected, bootstyle="info").pack(
+            pady=6, fill=tk.X
+        )
+        self._create_button(middle_frame, text="清空", command=self.clear_selected, bootstyle="secondary").pack(
+            pady=6, fill=tk.X
+        )
+
+        # 已选列表
+        right_frame = ttk.Frame(lists_frame)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        ttk.Label(right_frame, text="已选 PPT 文件（可拖拽排序）").pack()
+        self.selected_listbox = DraggableListbox(right_frame, selectmode=tk.BROWSE, exportselection=False)
+        self.selected_listbox.pack(fill=tk.BOTH, expand=True, padx=6, pady=6)
+        self.selected_listbox.bind("<<ListboxReordered>>", self._sync_order_with_model)
+        self.selected_listbox.bind("<<ListboxSelect>>", self._on_selected_item_changed)
+
+        # 为选中的 PPT 设置只合并的幻灯片范围
+        slides_frame = ttk.Frame(right_frame)
+        slides_frame.pack(fill=tk.X, padx=6)
+        ttk.Label(slides_frame, text="幻灯片范围：").pack(side=tk.LEFT)
+        self.slides_var = tk.StringVar(value="")
+        slides_entry = ttk.Entry(slides_frame, textvariable=self.slides_var, width=14)
+        slides_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        slides_entry.bind("<Return>", lambda _event: self.apply_slide_range())
+        self._create_button(slides_frame, text="应用", command=self.apply_slide_range, bootstyle="secondary").pack(
+            side=tk.LEFT, padx=(4, 0)
+        )
+
+        # 底部按钮
+        bottom_frame = ttk.Frame(outer)
+        bottom_frame.pack(fill=tk.X)
+
+        # 第一行：合并PPT按钮
+        merge_ppt_frame = ttk.Frame(bottom_frame)
+        merge_ppt_frame.pack(fill=tk.X, pady=(0, 4))
+        
+        self._create_button(
+            merge_ppt_frame,
+            text="合并为 PPT",
+            command=self.merge_ppts,
+            bootstyle="info",
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4)
+
+        self._create_button(
+            merge_ppt_frame,
+            text="预览合并 PDF",
+            command=self.preview_output,
+            bootstyle="secondary",
+        ).pack(side=tk.LEFT, padx=4)
+
+        # PDF 压缩选项
+        optimize_frame = ttk.Frame(bottom_frame)
+        optimize_frame.pack(fill=tk.X, pady=(0, 4))
+        self.optimize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            optimize_frame,
+            text="压缩输出 PDF（降采样图片）",
+            variable=self.optimize_var,
+            command=self._on_optimize_changed,
+        ).pack(side=tk.LEFT, padx=4)
+        ttk.Label(optimize_frame, text="大小上限 (MB，留空不限)：").pack(side=tk.LEFT, padx=(12, 0))
+        self.max_size_var = tk.StringVar(value="")
+        max_size_entry = ttk.Entry(optimize_frame, textvariable=self.max_size_var, width=8)
+        max_size_entry.pack(side=tk.LEFT)
+        max_size_entry.bind("<FocusOut>", self._on_optimize_changed)
+
+        # 第二行：PDF合并按钮
+        pdf_frame = ttk.Frame(bottom_frame)
+        pdf_frame.pack(fill=tk.X)
+
+        self._create_button(
+            pdf_frame,
+            text="博士组会",
+            command=lambda: self.start_process("博士组会"),
+            bootstyle="success",
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4, pady=(0, 4))
+
+        self._create_button(
+            pdf_frame,
+            text="大模型和开放世界组组会",
+            command=lambda: self.start_process("大模型和开放世界组组会"),
+            bootstyle="primary",
+        ).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=4, pady=(0, 4))
+
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(bottom_frame, textvariable=self.status_var).pack(fill=tk.X, padx=4)
+
+    def _create_button(self, parent, text, command, bootstyle="secondary", **kwargs):
+        if self.use_bootstrap and ttkb is not None:
+            return ttkb.Button(parent, text=text, command=command, bootstyle=bootstyle, **kwargs)
+
+        style_name = self._style_map.get(bootstyle.lower(), "TButton")
+        button = ttk.Button(parent, text=text, command=command, style=style_name, **kwargs)
+        return button
+
+    def _configure_styles(self):
+        if self.use_bootstrap:
+            return
+
+        try:
+            self.style.theme_use("clam")
+        except tk.TclError:
+            pass
+
+        default_font = ("Microsoft YaHei", 11)
+        for style_name in {"TButton", *self._style_map.values()}:
+            self.style.configure(style_name, font=default_font, padding=6)
+
+        self.style.configure("Success.TButton", background="#4CAF50", foreground="white")
+        self.style.map(
+            "Success.TButton",
+            background=[("pressed", "#388E3C"), ("active", "#45A049")],
+            foreground=[("disabled", "#DDDDDD")],
+        )
+
+        self.style.configure("Primary.TButton", background="#2196F3", foreground="white")
+        self.style.map(
+            "Primary.TButton",
+            background=[("pressed", "#1976D2"), ("active", "#1E88E5")],
+            foreground=[("disabled", "#DDDDDD")],
+        )
+
+        self.style.configure("Info.TButton", background="#00ACC1", foreground="white")
+        self.style.map(
+            "Info.TButton",
+            background=[("pressed", "#00838F"), ("active", "#0097A7")],
+            foreground=[("disabled", "#DDDDDD")],
+        )
+
+        self.style.configure("Secondary.TButton", background="#607D8B", foreground="white")
+        self.style.map(
+            "Secondary.TButton",
+            background=[("pressed", "#455A64"), ("active", "#546E7A")],
+            foreground=[("disabled", "#DDDDDD")],
+        )
+
+    def choose_folder(self):
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        self.folder_path = folder
+        self.folder_var.set(folder)
+        self._load_ppt_files()
+        self._save_last_state()
+
+    def _on_optimize_changed(self, _event=None):
+        self.optimize_options.enabled = bool(self.optimize_var.get())
+        text = self.max_size_var.get().strip()
+        try:
+            self.optimize_options.max_size_mb = float(text) if text else None
+        except ValueError:
+            self.optimize_options.max_size_mb = None
+            self.max_size_var.set("")
+        self._save_last_state()
+
+    def _load_last_state(self):
+        data = load_settings(self.config_path)
+        if not data:
+            return
+        self.optimize_options = PDFOptimizeOptions.from_dict(data.get("pdf_optimize"))
+        self.converter_options = ConverterOptions.from_dict(data.get("converter"))
+        self.staging_options = StagingOptions.from_dict(data.get("staging"))
+        self.optimize_var.set(bool(self.optimize_options.enabled))
+        if self.optimize_options.max_size_mb:
+            self.max_size_var.set(str(self.optimize_options.max_size_mb))
+        folder = data.get("last_folder")
+        if not folder or not os.path.isdir(folder):
+            return
+        self.folder_path = folder
+        self.folder_var.set(folder)
+        self._load_ppt_files()
+
+    def _save_last_state(self):
+        data = {
+            "last_folder": self.folder_path,
+            "pdf_optimize": self.optimize_options.to_dict(),
+            "converter": self.converter_options.to_dict(),
+            "staging": self.staging_options.to_dict(),
+        }
+        try:
+            atomic_write(
+                self.config_path,
+                lambda cfg_file: json.dump(data, cfg_file, ensure_ascii=False, indent=2),
+                mode="w",
+            )
+        except OSError:
+            pass
+
+    def _load_ppt_files(self):
+        if not self.folder_path:
+            return
+        self.available_items.clear()
+        self.available_listbox.delete(0, tk.END)
+        self._clear_selected_items()
+
+        for entry in sorted(os.listdir(self.folder_path)):
+            if entry.lower().endswith((".ppt", ".pptx")):
+                full_path = os.path.join(self.folder_path, entry)
+                if os.path.isfile(full_path):
+                    item = PPTItem(display_name=entry, file_path=full_path)
+                    self.available_items.append(item)
+                    self.available_listbox.insert(tk.END, entry)
+
+        if not self.available_items:
+            messagebox.showinfo("提示", "该目录中未找到 PPT 或 PPTX 文件。")
+            return
+
+        # 恢复该目录上次的选择和顺序
+        self._restore_session(SESSION_WORKING)
+
+    def _refresh_session_names(self):
+        names = self.session_store.names(self.folder_path) if self.folder_path else []
+        self.session_combo["values"] = names
+
+    def _restore_session(self, name: str):
+        paths = self.session_store.resolve(
+            self.folder_path, name, [item.file_path for item in self.available_items]
+        )
+        by_path = {item.file_path: item for item in self.available_items}
+        self._clear_selected_items()
+        for path, slides in paths:
+            try:
+                item = dataclasses.replace(by_path[path], slides=slides)
+            except ValueError:
+                item = by_path[path]
+            self.selected_items.append(item)
+            self.selected_listbox.insert(tk.END, item.label)
+        self._refresh_session_names()
+
+    def _on_session_selected(self, _event=None):
+        name = self.session_var.get()
+        if not name or not self.folder_path:
+            return
+        self._restore_session(name)
+        self._on_selection_changed()
+
+    def _on_selection_changed(self, name: str = SESSION_WORKING):
+        if not self.folder_path:
+            return
+        self.session_store.schedule_save(
+            self.folder_path, name, [(item.file_path, item.slides) for item in self.selected_items]
+        )
+        if name not in self.session_combo["values"]:
+            self._refresh_session_names()
+
+    def add_selected(self):
+        indices = list(self.available_listbox.curselection())
+        if not indices:
+            messagebox.showwarning("提示", "请在左侧列表中选择至少一个 PPT。")
+            return
+
+        selected_paths = {item.file_path for item in self.selected_items}
+        for idx in indices:
+            item = self.available_items[idx]
+            if item.file_path not in selected_paths:
+                self.selected_items.append(item)
+                self.selected_listbox.insert(tk.END, item.label)
+        self._on_selection_changed()
+
+    def add_all(self):
+        if not self.available_items:
+            messagebox.showinfo("提示", "当前目录没有可用的 PPT。")
+            return
+        added = False
+        selected_paths = {item.file_path for item in self.selected_items}
+        for item in self.available_items:
+            if item.file_path not in selected_paths:
+                self.selected_items.append(item)
+                self.selected_listbox.insert(tk.END, item.label)
+                added = True
+        if added:
+            self._on_selection_changed()
+        else:
+            messagebox.showinfo("提示", "所有 PPT 已经在右侧列表中。")
+
+    def remove_selected(self):
+        idx = self.selected_listbox.curselection()
+        if not idx:
+            messagebox.showwarning("提示", "请在右侧列表中选择要移除的 PPT。")
+            return
+        pos = idx[0]
+        self.selected_listbox.delete(pos)
+        del self.selected_items[pos]
+        self._on_selection_changed()
+
+    def clear_selected(self):
+        self._clear_selected_items()
+        self._on_selection_changed()
+
+    def _clear_selected_items(self):
+        self.selected_listbox.delete(0, tk.END)
+        self.selected_items.clear()
+        self.slides_var.set("")
+
+    def _on_selected_item_changed(self, _event=None):
+        idx = self.selected_listbox.curselection()
+        if idx:
+            self.slides_var.set(self.selected_items[idx[0]].slides or "")
+
+    def apply_slide_range(self):
+        idx = self.selected_listbox.curselection()
+        if not idx:
+            messagebox.showwarning("提示", "请在右侧列表中选择要设置范围的 PPT。")
+            return
+        pos = idx[0]
+        try:
+            # 只替换已选列表中的条目，左侧可选文件保持整份
+            item = dataclasses.replace(self.selected_items[pos], slides=self.slides_var.get())
+        except ValueError as exc:
+            messagebox.showerror("错误", f"{exc}\n\n示例：5-20 或 1-3,8,10-12（留空表示全部）")
+            return
+        self.selected_items[pos] = item
+        self.slides_var.set(item.slides or "")
+        self.selected_listbox.delete(pos)
+        self.selected_listbox.insert(pos, item.label)
+        self.selected_listbox.selection_set(pos)
+        self._on_selection_changed()
+
+    def _sync_order_with_model(self, _event=None):
+        new_order: List[PPTItem] = []
+        for i in range(self.selected_listbox.size()):
+            name = self.selected_listbox.get(i)
+            match = next((item for item in self.selected_items if item.label == name), None)
+            if match:
+                new_order.append(match)
+        # 如果拖动后有重复或遗漏，回退到线性搜索结果
+        if len(new_order) == len(self.selected_items):
+            self.selected_items = new_order
+            self._on_selection_changed()
+
+    def start_process(self, mode_label: str):
+        if not self.selected_items:
+            messagebox.showwarning("提示", "请先选择至少一个 PPT 文件。")
+            return
+
+        if not self.folder_path:
+            messagebox.showwarning("提示", "请先选择工作目录。")
+            return
+
+        if not os.path.exists(self.vbs_path):
+            messagebox.showerror("错误", f"未找到 VBS 脚本：{self.vbs_path}")
+            return
+
+        if PyPDF2 is None or canvas is None or A4 is None:
+            messagebox.showerror(
+                "缺少依赖",
+                "请先安装依赖库：\n\npip install PyPDF2 reportlab",
+            )
+            return
+
+        self._on_selection_changed(mode_label)
+        spec = self._job_spec("pdf")
+        spec["mode_label"] = mode_label
+        self._submit_job(spec, self._on_pdf_job_done)
+
+    def _job_spec(self, kind: str) -> dict:
+        return {
+            "kind": kind,
+            "folder": self.folder_path,
+            "items": [
+                {"display_name": item.display_name, "file_path": item.file_path, "slides": item.slides}
+                for item in self.selected_items
+            ],
+            "pdf_optimize": self.optimize_options.to_dict(),
+        }
+
+    def _submit_job(self, spec: dict, on_done: Callable[[dict], None]):
+        try:
+            try:
+                job_id = self.service.submit(spec)
+            except urllib.error.URLError:
+                # 服务进程已空闲退出或被关闭：重新连接（必要时重新启动）后再提交一次
+                self.service = connect_service(self.script_dir)
+                job_id = self.service.submit(spec)
+        except Exception as exc:
+            messagebox.showerror("错误", f"无法提交任务：\n{exc}")
+            return
+        client = self.service
+        self.status_var.set("任务已提交，等待执行…")
+        events: "queue.Queue[dict]" = queue.Queue()
+
+        def watch():
+            try:
+                for event in client.events(job_id):
+                    events.put(event)
+            except Exception as exc:
+                events.put({"type": "failed", "error": f"与合并服务的连接中断：{exc}"})
+
+        threading.Thread(target=watch, name=f"job-{job_id}", daemon=True).start()
+        self.root.after(100, self._poll_job_events, events, spec["kind"], on_done)
+
+    def _poll_job_events(self, events: "queue.Queue[dict]", kind: str, on_done: Callable[[dict], None]):
+        """在界面线程中处理服务推送的事件（Tk 不允许跨线程操作控件）"""
+        while True:
+            try:
+                event = events.get_nowait()
+            except queue.Empty:
+                break
+            if event["type"] == "progress":
+                self.status_var.set(event["message"])
+            elif event["type"] == "started":
+                self.status_var.set("正在处理…")
+            elif event["type"] == "done":
+                self.status_var.set("")
+                on_done(event["result"])
+                return
+            elif event["type"] == "failed":
+                self.status_var.set("")
+                if kind == "pdf":
+                    messagebox.showerror(
+                        "错误",
+                        f"处理过程中出现问题：\n{event['error']}\n\n已完成的转换已记录，重新运行将从断点继续。",
+                    )
+                else:
+                    messagebox.showerror("错误", f"合并PPT过程中出现问题：\n{event['error']}")
+                return
+        self.root.after(100, self._poll_job_events, events, kind, on_done)
+
+    def _on_pdf_job_done(self, result: dict):
+        output_path = result["output_path"]
+        self.last_output = (output_path, [tuple(key) for key in result.get("page_keys", [])])
+        message = f"合并文件已生成：\n{output_path}"
+        if result.get("optimize_summary"):
+            message += "\n\n" + result["optimize_summary"]
+        messagebox.showinfo("完成", message)
+
+    def preview_output(self):
+        """打开最近一次合并 PDF 的缩略图预览"""
+        if self.last_output is None or not os.path.exists(self.last_output[0]):
+            messagebox.showwarning("提示", "请先生成合并 PDF。")
+            return
+        if PyPDF2 is None:
+            messagebox.showerror("缺少依赖", "请先安装依赖库：\n\npip install PyPDF2")
+            return
+        if not thumbnail_renderer_available():
+            messagebox.showerror(
+                "缺少依赖",
+                "预览需要 PyMuPDF：\n\npip install pymupdf\n\n或安装 poppler 提供的 pdftoppm。",
+            )
+            return
+
+        output_path, page_keys = self.last_output
+        reader = PyPDF2.PdfReader(output_path)
+        page_sizes = [(float(page.mediabox.width), float(page.mediabox.height)) for page in reader.pages]
+        if len(page_keys) != len(page_sizes):
+            # 续跑复用的旧输出没有页面来源信息，退回按输出文件本身作键
+            output_key = file_fingerprint(output_path)
+            page_keys = [(output_key, index) for index in range(len(page_sizes))]
+        if self._render_pool is None:
+            self._render_pool = ProcessPoolExecutor(max_workers=2)
+        PagePreviewWindow(self.root, output_path, page_keys, page_sizes, self.thumbnail_cache, self._render_pool)
+
+    def merge_ppts(self):
+        """使用PowerPoint COM接口直接合并PPT文件"""
+        if not self.selected_items:
+            messagebox.showwarning("提示", "请先选择至少一个 PPT 文件。")
+            return
+
+        if not self.folder_path:
+            messagebox.showwarning("提示", "请先选择工作目录。")
+            return
+
+        # 检查平台和依赖
+        if self.is_windows:
+            if win32com is None:
+                messagebox.showerror(
+                    "缺少依赖",
+                    "请先安装依赖库：\n\npip install pywin32",
+                )
+                return
+        elif self.is_mac:
+            # Mac 上使用 python-pptx
+            if Presentation is None:
+                messagebox.showerror(
+                    "缺少依赖",
+                    "请先安装依赖库：\n\npip install python-pptx",
+                )
+                return
+        else:
+            messagebox.showerror(
+                "不支持的操作系统",
+                f"当前操作系统 {platform.system()} 暂不支持合并PPT功能。\n请使用 Windows 或 macOS。",
+            )
+            return
+
+        self._on_selection_changed("合并PPT")
+        self._submit_job(
+            self._job_spec("ppt"),
+            lambda result: messagebox.showinfo("完成", f"合并PPT文件已生成：\n{result['output_path']}"),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPT 转 PDF 合并工具")
+    parser.add_argument("--serve", action="store_true", help="以本地合并服务模式运行（不启动界面）")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=2, help="同时执行的合并任务数（服务模式为线程数，归档模式为进程数）")
+    parser.add_argument("--idle-exit", type=float, help="服务模式下没有任务且这么多秒内没有请求时退出（默认一直运行）")
+    parser.add_argument("--fake-converter", action="store_true", help="使用不依赖 PowerPoint 的假转换器（测试用）")
+    parser.add_argument("--archive", metavar="ROOT", help="归档模式：把 ROOT 下每个含 PPT 的子目录各合并为一个 PDF，并生成总目录")
+    parser.add_argument("--label", default="合并", help="归档模式下输出文件名中的标签")
+    parser.add_argument("--max-conversions", type=int, default=1, help="归档模式下所有进程合计的最大并发转换数")
+    parser.add_argument("--force", action="store_true", help="归档模式下忽略输入清单，重新合并所有目录")
+    parser.add_argument("--fake-convert", metavar="PPT", help=argparse.SUPPRESS)
+    parser.add_argument("--fake-slides", help=argparse.SUPPRESS)
+    parser.add_argument("--script-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # 界面启动服务进程时传入自己的脚本目录，双方读写同一个口令文件
+    script_dir = os.path.abspath(args.script_dir or os.path.dirname(sys.argv[0] or __file__))
+    if args.fake_convert:
+        # 与 PowerPoint 一样只导出文稿中实际存在的页；读不出幻灯片数时假定所选页都存在
+        total = count_pptx_slides(args.fake_convert)
+        numbers = parse_slide_range(args.fake_slides)
+        if numbers is not None:
+            numbers = [number for number in numbers if total is None or number <= total]
+            if not numbers:
+                sys.exit(f"幻灯片范围 {args.fake_slides} 超出文稿的 {total} 页")
+            print(SLIDES_APPLIED_MARKER)
+        write_placeholder_pdf(os.path.splitext(args.fake_convert)[0] + ".pdf", len(numbers) if numbers else total or 3)
+        return
+    if args.archive:
+        try:
+            summary = run_archive(
+                args.archive,
+                script_dir,
+                mode_label=args.label,
+                workers=args.workers,
+                max_conversions=args.max_conversions,
+                force=args.force,
+                fake_converter=args.fake_converter,
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        print(
+            f"已合并 {summary['built']} 个目录，跳过 {summary['skipped']} 个未变化的目录"
+            f"\n总目录：{summary['index_pdf'] or summary['index_json']}"
+        )
+        if summary["failed"]:
+            sys.exit(1)
+        return
+    if args.serve:
+        serve_forever(script_dir, args.host, args.port, args.workers, args.fake_converter, args.idle_exit)
+        return
+
     if ttkb is not None:
         root = ttkb.Window(themename="cosmo")
     else:
@@ -0,0 +1,78 @@
+"""测试用转换器替身：按参数睡眠、崩溃、输出到 stderr，或启动脱离进程树的"PowerPoint"进程。
+
+用法示例：
+    python stub_converter.py --sleep 30
+    python stub_converter.py --stderr "boom" --exit 3
+    python stub_converter.py --fail-until 2 --counter /tmp/count
+    python stub_converter.py --child /tmp/child.pid --sleep 30
+    python stub_converter.py --orphan /tmp/fakepowerpnt /tmp/orphan.pid --sleep 30
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def _write_pid(path: str, pid: int):
+    with open(path, "w", encoding="utf-8") as pid_file:
+        pid_file.write(str(pid))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sleep", type=float, default=0.0, help="退出前睡眠的秒数（模拟卡死）")
+    parser.add_argument("--exit", type=int, default=0, help="退出码（非零模拟崩溃）")
+    parser.add_argument("--stdout", default="", help="写到 stdout 的内容")
+    parser.add_argument("--stderr", default="", help="写到 stderr 的内容")
+    parser.add_argument("--fail-until", type=int, default=0, help="前 N-1 次调用以退出码 1 失败")
+    parser.add_argument("--counter", help="记录调用次数的文件，配合 --fail-until 使用")
+    parser.add_argument("--child", metavar="PIDFILE", help="启动一个同进程组的子进程，并写出其 pid")
+    parser.add_argument(
+        "--orphan",
+        nargs=2,
+        metavar=("EXECUTABLE", "PIDFILE"),
+        help="像 DCOM 启动 PowerPoint 那样启动一个脱离本进程树的进程（参数为秒数），并写出其 pid",
+    )
+    args = parser.parse_args()
+
+    if args.counter:
+        count = 0
+        if os.path.exists(args.counter):
+            with open(args.counter, "r", encoding="utf-8") as counter_file:
+                count = int(counter_file.read() or 0)
+        count += 1
+        with open(args.counter, "w", encoding="utf-8") as counter_file:
+            counter_file.write(str(count))
+        if count < args.fail_until:
+            sys.stderr.write(f"attempt {count} failed\n")
+            sys.exit(1)
+
+    if args.child:
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+        _write_pid(args.child, child.pid)
+    if args.orphan:
+        executable, pid_file = args.orphan
+        orphan = subprocess.Popen(
+            [executable, "60"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        _write_pid(pid_file, orphan.pid)
+
+    if args.stdout:
+        sys.stdout.write(args.stdout)
+        sys.stdout.flush()
+    if args.stderr:
+        sys.stderr.write(args.stderr)
+        sys.stderr.flush()
+    if args.sleep:
+        time.sleep(args.sleep)
+    sys.exit(args.exit)
+
+
+if __name__ == "__main__":
+    main()
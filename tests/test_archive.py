@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+
+class ArchiveRebuildTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="archive_test_")
+        self.script_dir = os.path.join(self.tmp_dir, "app")
+        self.root = os.path.join(self.tmp_dir, "term")
+        self.folder = os.path.join(self.root, "week1")
+        os.makedirs(self.script_dir)
+        os.makedirs(self.folder)
+        for name in ("a.pptx", "b.pptx"):
+            with open(os.path.join(self.folder, name), "wb") as deck_file:
+                deck_file.write(os.urandom(2048))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _archive(self, **kwargs) -> dict:
+        return merger.run_archive(
+            self.root, self.script_dir, workers=1, fake_converter=True, log=lambda message: None, **kwargs
+        )
+
+    def _set_previous_output(self, path: str):
+        state_path = os.path.join(self.root, merger.ARCHIVE_STATE_NAME)
+        with open(state_path, "r", encoding="utf-8") as state_file:
+            state = json.load(state_file)
+        state["folders"]["week1"]["output_path"] = path
+        with open(state_path, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file, ensure_ascii=False)
+
+    def test_rebuild_removes_previous_dated_output(self):
+        self.assertEqual(self._archive()["built"], 1)
+        old_output = os.path.join(self.folder, "2020-01-01合并.pdf")
+        merger.write_placeholder_pdf(old_output, 1)
+        self._set_previous_output(old_output)
+
+        summary = self._archive(force=True)
+        self.assertEqual(summary["built"], 1)
+        self.assertFalse(os.path.exists(old_output))
+        pdfs = [name for name in os.listdir(self.folder) if name.endswith(".pdf")]
+        self.assertEqual(len(pdfs), 1)
+
+    def test_rebuild_keeps_files_outside_the_folder(self):
+        self._archive()
+        outside = os.path.join(self.tmp_dir, "keep.pdf")
+        merger.write_placeholder_pdf(outside, 1)
+        self._set_previous_output(outside)
+
+        self._archive(force=True)
+        self.assertTrue(os.path.exists(outside))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+
+class ConversionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="cache_test_")
+        self.cache = merger.ConversionCache(os.path.join(self.tmp_dir, "cache"))
+        self.pdf_path = os.path.join(self.tmp_dir, "deck.pdf")
+        merger.write_placeholder_pdf(self.pdf_path, 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _stored(self, name: str) -> str:
+        ppt_path = os.path.join(self.tmp_dir, name)
+        with open(ppt_path, "wb") as deck_file:
+            deck_file.write(name.encode("utf-8"))
+        cached = self.cache.store(ppt_path, self.pdf_path)
+        # 模拟十天前存入的条目
+        stale = time.time() - 10 * 86400
+        os.utime(cached, (stale, stale))
+        return ppt_path
+
+    def test_prune_keeps_entries_that_are_still_used(self):
+        used = self._stored("used.pptx")
+        unused = self._stored("unused.pptx")
+        self.assertIsNotNone(self.cache.lookup(used))
+        self.cache.prune()
+        self.assertIsNotNone(self.cache.lookup(used))
+        self.assertIsNone(self.cache.lookup(unused))
+
+
+if __name__ == "__main__":
+    unittest.main()
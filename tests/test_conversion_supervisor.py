@@ -0,0 +1,128 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ppt_pdf_merger import ConversionError, ConversionSupervisor, ConverterOptions  # noqa: E402
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stub_converter.py")
+
+
+def _stub(*args):
+    return [sys.executable, STUB, *args]
+
+
+def _alive(pid: int) -> bool:
+    # 已结束但尚未被回收的僵尸进程也算结束
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as stat_file:
+            return stat_file.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def _wait_dead(pid: int, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not _alive(pid):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def _read_pid(path: str) -> int:
+    with open(path, "r", encoding="utf-8") as pid_file:
+        return int(pid_file.read())
+
+
+class ConversionSupervisorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="supervisor_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, command, **options):
+        options.setdefault("backoff", 0.01)
+        options.setdefault("orphan_processes", [])
+        supervisor = ConversionSupervisor(ConverterOptions(**options))
+        return supervisor.run_all([("deck", command)])[0]
+
+    def test_success_captures_stdout(self):
+        result = self._run(_stub("--stdout", "converted"))
+        self.assertTrue(result.ok)
+        self.assertEqual(len(result.attempts), 1)
+        self.assertEqual(result.last.stdout, "converted")
+
+    def test_crash_is_retried_and_stderr_reported(self):
+        result = self._run(_stub("--stderr", "PowerPoint crashed", "--exit", "3"), retries=2)
+        self.assertFalse(result.ok)
+        self.assertEqual([attempt.returncode for attempt in result.attempts], [3, 3, 3])
+        self.assertEqual(result.last.stderr, "PowerPoint crashed")
+        self.assertIn("PowerPoint crashed", str(ConversionError(result, "a.pptx")))
+
+    def test_retry_recovers_after_transient_failure(self):
+        counter = os.path.join(self.tmp_dir, "count")
+        result = self._run(_stub("--fail-until", "2", "--counter", counter), retries=2)
+        self.assertTrue(result.ok)
+        self.assertEqual([attempt.returncode for attempt in result.attempts], [1, 0])
+
+    def test_timeout_kills_and_retries(self):
+        started = time.monotonic()
+        result = self._run(_stub("--sleep", "30"), timeout=0.5, retries=1)
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.attempts), 2)
+        self.assertTrue(all(attempt.timed_out for attempt in result.attempts))
+        self.assertLess(time.monotonic() - started, 15)
+        self.assertIn("超时", str(ConversionError(result)))
+
+    def test_unstartable_command_is_not_retried(self):
+        result = self._run([os.path.join(self.tmp_dir, "missing-converter")], retries=3)
+        self.assertFalse(result.ok)
+        self.assertEqual(len(result.attempts), 1)
+        self.assertIsNone(result.last.returncode)
+
+    @unittest.skipIf(os.name == "nt", "进程组测试只在 POSIX 上运行")
+    def test_timeout_kills_child_processes(self):
+        pid_file = os.path.join(self.tmp_dir, "child.pid")
+        result = self._run(_stub("--child", pid_file, "--sleep", "30"), timeout=1.0, retries=0)
+        self.assertTrue(result.last.timed_out)
+        self.assertTrue(_wait_dead(_read_pid(pid_file)))
+
+    @unittest.skipIf(os.name == "nt" or shutil.which("sleep") is None, "需要 POSIX 的 sleep 命令")
+    def test_timeout_kills_detached_office_process_started_by_attempt(self):
+        # 用改名的 sleep 模拟 DCOM 启动的 POWERPNT.EXE：不在转换进程的进程树里
+        fake_office = os.path.join(self.tmp_dir, "fakepowerpnt")
+        os.symlink(shutil.which("sleep"), fake_office)
+        preexisting = subprocess.Popen([fake_office, "60"])
+        try:
+            pid_file = os.path.join(self.tmp_dir, "orphan.pid")
+            result = self._run(
+                _stub("--orphan", fake_office, pid_file, "--sleep", "30"),
+                timeout=1.0,
+                retries=0,
+                orphan_processes=["fakepowerpnt"],
+            )
+            self.assertTrue(result.last.timed_out)
+            self.assertTrue(_wait_dead(_read_pid(pid_file)))
+            # 尝试开始前已在运行的同名进程（如用户自己的 PowerPoint）不受影响
+            self.assertIsNone(preexisting.poll())
+        finally:
+            preexisting.kill()
+            preexisting.wait()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+import json
+import os
+import shutil
+import socket
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+
+class MergeServiceApiTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="service_test_")
+        self.script_dir = os.path.join(self.tmp_dir, "app")
+        self.folder = os.path.join(self.tmp_dir, "deck")
+        os.makedirs(self.script_dir)
+        os.makedirs(self.folder)
+        for name in ("a.pptx", "b.pptx"):
+            with open(os.path.join(self.folder, name), "wb") as deck_file:
+                deck_file.write(os.urandom(2048))
+        font_index = merger.FontIndex(os.path.join(self.script_dir, "fonts.json"), font_dirs=[])
+        font_index.load()
+        context = merger.EngineContext(
+            self.script_dir,
+            font_index,
+            merger.ConversionCache(os.path.join(self.tmp_dir, "cache")),
+            merger.fake_converter_command,
+        )
+        self.service = merger.MergeService(context, workers=2)
+        self.token = merger.load_service_token(self.script_dir)
+        self.server = merger.start_service_server(self.service, self.token, port=0)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = merger.ServiceClient(self.base_url, self.token)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.shutdown()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _spec(self, **overrides):
+        spec = {
+            "kind": "pdf",
+            "folder": self.folder,
+            "mode_label": "测试",
+            "items": [
+                {"display_name": name, "file_path": os.path.join(self.folder, name)} for name in ("a.pptx", "b.pptx")
+            ],
+        }
+        spec.update(overrides)
+        return spec
+
+    def _raw_post(self, body: bytes, headers: dict) -> int:
+        request = urllib.request.Request(self.base_url + "/jobs", data=body, method="POST", headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+    def _events(self, job_id: str) -> list:
+        return [event["type"] for event in self.client.events(job_id) if event["type"] != "keepalive"]
+
+    def test_token_file_is_private(self):
+        if os.name == "posix":
+            mode = stat.S_IMODE(os.stat(os.path.join(self.script_dir, merger.SERVICE_TOKEN_NAME)).st_mode)
+            self.assertEqual(mode, 0o600)
+        self.assertEqual(merger.load_service_token(self.script_dir), self.token)
+
+    def test_rejects_requests_without_token_or_from_browsers(self):
+        body = json.dumps(self._spec()).encode("utf-8")
+        json_headers = {"Content-Type": "application/json"}
+        self.assertEqual(self._raw_post(body, json_headers), 401)
+        authed = dict(json_headers, **{merger.SERVICE_TOKEN_HEADER: self.token})
+        self.assertEqual(self._raw_post(body, dict(authed, Origin="http://evil.example")), 403)
+        self.assertEqual(self._raw_post(body, dict(authed, **{"Content-Type": "text/plain"})), 415)
+        self.assertFalse(merger.ServiceClient(self.base_url, "wrong").ping())
+        self.assertEqual(self.service.jobs(), [])
+
+    def test_rejects_malformed_specs(self):
+        for spec in (
+            ["not", "an", "object"],
+            self._spec(items=[{"file_path": os.path.join(self.folder, "a.pptx")}]),
+            self._spec(items=["a.pptx"]),
+            self._spec(mode_label="/../../escape"),
+            self._spec(mode_label="..\\escape"),
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client._request("POST", "/jobs", spec)
+        self.assertEqual(self.service.jobs(), [])
+
+    def test_rejects_invalid_optimize_options(self):
+        headers = {"Content-Type": "application/json", merger.SERVICE_TOKEN_HEADER: self.token}
+        for options in (
+            "fast",
+            {"workers": 0},
+            {"workers": "8"},
+            {"jpeg_quality": 500},
+            {"target_dpi": 72.5},
+            {"enabled": "yes"},
+            {"max_size_mb": -1},
+        ):
+            with self.subTest(pdf_optimize=options):
+                body = json.dumps(self._spec(pdf_optimize=options)).encode("utf-8")
+                self.assertEqual(self._raw_post(body, headers), 400)
+        self.assertEqual(self.service.jobs(), [])
+        valid = dict(merger.PDFOptimizeOptions().to_dict(), workers=2, max_size_mb=1.5)
+        self.assertEqual(self._events(self.client.submit(self._spec(pdf_optimize=valid)))[-1], "done")
+
+    def test_job_runs_and_streams_events(self):
+        job_id = self.client.submit(self._spec())
+        events = self._events(job_id)
+        self.assertEqual(events[:2], ["queued", "started"])
+        self.assertEqual(events[-1], "done")
+        self.assertEqual(set(events[2:-1]), {"progress"})
+        output_path = self.client.status(job_id)["result"]["output_path"]
+        self.assertEqual(os.path.dirname(output_path), self.folder)
+
+    def test_finished_jobs_are_evicted(self):
+        self.service.max_jobs = 2
+        job_ids = []
+        for _ in range(3):
+            job_ids.append(self.client.submit(self._spec()))
+            self.assertEqual(self._events(job_ids[-1])[-1], "done")
+        listed = [job["id"] for job in self.service.jobs()]
+        self.assertEqual(listed, job_ids[1:])
+        self.assertIsNone(self.service.get(job_ids[0]))
+        self.service.retention = 0
+        self.assertEqual(self.service.jobs(), [])
+
+    def test_concurrent_jobs_share_one_conversion_slot(self):
+        log_path = os.path.join(self.tmp_dir, "conversions.log")
+        script = (
+            "import sys, time\n"
+            f"sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})\n"
+            "import ppt_pdf_merger\n"
+            f"log = open({log_path!r}, 'a')\n"
+            "log.write(f'{time.time()} start\\n'); log.flush()\n"
+            "time.sleep(0.3)\n"
+            "ppt_pdf_merger.write_placeholder_pdf(sys.argv[1][:-5] + '.pdf')\n"
+            "log.write(f'{time.time()} end\\n'); log.close()\n"
+        )
+        self.service.context.command_factory = lambda ppt_path, slides: [sys.executable, "-c", script, ppt_path]
+        other_folder = os.path.join(self.tmp_dir, "deck2")
+        shutil.copytree(self.folder, other_folder)
+        other_items = [
+            {"display_name": name, "file_path": os.path.join(other_folder, name)} for name in ("a.pptx", "b.pptx")
+        ]
+        job_ids = [
+            self.client.submit(self._spec()),
+            self.client.submit(self._spec(folder=other_folder, items=other_items)),
+        ]
+        for job_id in job_ids:
+            self.assertEqual(self._events(job_id)[-1], "done")
+        with open(log_path, "r", encoding="utf-8") as log_file:
+            marks = [line.split()[1] for line in log_file]
+        # 任意时刻最多一个转换在运行：日志必须是 start/end 严格交替
+        self.assertEqual(marks, ["start", "end"] * 4)
+
+    def test_failure_while_building_job_ends_event_stream(self):
+        job = merger.MergeJob(self._spec(items=[{"display_name": "a.pptx", "file_path": 42}]))
+        self.service._jobs[job.id] = job
+        self.service._run_job(job)
+        self.assertEqual(job.state, "failed")
+        self.assertEqual([event["type"] for event in self.service.iter_events(job)], ["started", "failed"])
+
+
+class ServiceProcessTest(unittest.TestCase):
+    def setUp(self):
+        self.script_dir = tempfile.mkdtemp(prefix="service_process_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.script_dir, ignore_errors=True)
+
+    def test_started_service_runs_in_its_own_process_and_exits_when_idle(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        client = merger.connect_service(self.script_dir, port=port, idle_exit=2)
+        self.assertEqual(client.base_url, f"http://127.0.0.1:{port}")
+        self.assertTrue(client.ping())
+        # 服务不在当前进程中：关闭启动它的窗口不影响其他客户端
+        self.assertNotIn("merge-service", [thread.name for thread in threading.enumerate()])
+
+        # 只探测端口是否还在监听：HTTP 请求会被算作活动，推迟空闲退出
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            except OSError:
+                break
+            time.sleep(0.5)
+        self.assertFalse(client.ping())
+
+
+if __name__ == "__main__":
+    unittest.main()
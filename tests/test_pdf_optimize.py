@@ -0,0 +1,73 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+
+@unittest.skipIf(
+    merger.fitz is None or merger.canvas is None or merger.Image is None or merger.PyPDF2 is None,
+    "需要 PyMuPDF、reportlab、Pillow 和 PyPDF2",
+)
+class OptimizePdfTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="optimize_test_")
+        photo = os.path.join(self.tmp_dir, "photo.jpg")
+        merger.Image.effect_noise((1600, 1200), 60).convert("RGB").save(photo, quality=95)
+        # 模拟合并结果：两份各自嵌入同一张图片的文稿拼在一起
+        writer = merger.PyPDF2.PdfWriter()
+        for deck, pages in (("a", range(1, 4)), ("b", range(4, 6))):
+            deck_path = os.path.join(self.tmp_dir, f"{deck}.pdf")
+            pdf = merger.canvas.Canvas(deck_path)
+            for number in pages:
+                pdf.drawString(72, 720, f"第 {number} 页 " * 5)
+                pdf.drawImage(photo, 72, 72, 300, 225)
+                pdf.showPage()
+            pdf.save()
+            for page in merger.PyPDF2.PdfReader(deck_path).pages:
+                writer.add_page(page)
+        self.input_path = os.path.join(self.tmp_dir, "merged.pdf")
+        with open(self.input_path, "wb") as merged_file:
+            writer.write(merged_file)
+        self.output_path = os.path.join(self.tmp_dir, "optimized.pdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _reopen_strictly(self) -> str:
+        """用 MuPDF 重新打开并解析每一页，返回期间的修复/语法警告"""
+        merger.fitz.TOOLS.mupdf_warnings()  # 清空之前的警告
+        with merger.fitz.open(self.output_path) as document:
+            self.assertEqual(document.page_count, 5)
+            for page in document:
+                page.get_text()
+        return merger.fitz.TOOLS.mupdf_warnings()
+
+    def _image_xrefs(self, path: str) -> set:
+        with merger.fitz.open(path) as document:
+            return {image[0] for page in document for image in page.get_images()}
+
+    def test_output_is_valid_pdf(self):
+        for compress_streams in (True, False):
+            with self.subTest(compress_streams=compress_streams):
+                options = merger.PDFOptimizeOptions(enabled=True, compress_streams=compress_streams)
+                report = merger.optimize_pdf(self.input_path, self.output_path, options)
+                self.assertLess(report.output_bytes, report.input_bytes)
+                self.assertEqual(self._reopen_strictly(), "")
+
+    def test_identical_images_are_stored_once(self):
+        self.assertEqual(len(self._image_xrefs(self.input_path)), 2)
+        for dedupe_objects, expected in ((True, 1), (False, 2)):
+            with self.subTest(dedupe_objects=dedupe_objects):
+                options = merger.PDFOptimizeOptions(enabled=True, dedupe_objects=dedupe_objects)
+                merger.optimize_pdf(self.input_path, self.output_path, options)
+                self.assertEqual(len(self._image_xrefs(self.output_path)), expected)
+                self.assertEqual(self._reopen_strictly(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+try:
+    from pptx import Presentation
+    from pptx.util import Inches
+    from PIL import Image
+except ImportError:
+    Presentation = None
+
+
+@unittest.skipIf(Presentation is None, "需要 python-pptx 和 Pillow")
+class PptxMergeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="pptx_merge_test_")
+        self.context = merger.EngineContext(
+            self.tmp_dir,
+            merger.FontIndex(os.path.join(self.tmp_dir, "fonts.json"), font_dirs=[]),
+            merger.ConversionCache(os.path.join(self.tmp_dir, "cache")),
+            None,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _deck(self, name: str, prefix: str, count: int, with_picture: bool = False) -> str:
+        presentation = Presentation()
+        picture = io.BytesIO()
+        Image.new("RGB", (8, 8), (200, 30, 30)).save(picture, format="PNG")
+        for number in range(1, count + 1):
+            slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+            slide.shapes.add_textbox(Inches(1), Inches(1), Inches(3), Inches(1)).text_frame.text = f"{prefix}{number}"
+            if with_picture:
+                picture.seek(0)
+                slide.shapes.add_picture(picture, Inches(4), Inches(1))
+        path = os.path.join(self.tmp_dir, name)
+        presentation.save(path)
+        return path
+
+    def _merge(self, items) -> str:
+        engine = merger.MergeEngine(self.context, self.tmp_dir, items)
+        return engine._merge_ppts_mac_to(os.path.join(self.tmp_dir, "merged.pptx"))
+
+    def _slide_texts(self, path: str) -> list:
+        return [
+            "".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame).split("1.")[0]
+            for slide in Presentation(path).slides
+        ]
+
+    def test_middle_range_keeps_slide_order(self):
+        first = self._deck("a.pptx", "A", 10)
+        second = self._deck("b.pptx", "B", 4, with_picture=True)
+        output = self._merge(
+            [
+                merger.PPTItem(display_name="a.pptx", file_path=first, slides="3-5"),
+                merger.PPTItem(display_name="b.pptx", file_path=second, slides="2-3"),
+            ]
+        )
+        with zipfile.ZipFile(output) as archive:
+            names = archive.namelist()
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(self._slide_texts(output), ["目录", "A3", "A4", "A5", "B2", "B3"])
+        pictures = [shape for shape in Presentation(output).slides[4].shapes if shape.shape_type == 13]
+        self.assertEqual(len(pictures), 1)
+        self.assertEqual(pictures[0].image.size, (8, 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+# 忽略幻灯片范围、总是导出整份文稿的转换器
+FULL_EXPORT_SCRIPT = (
+    "import sys\n"
+    f"sys.path.insert(0, {os.path.dirname(os.path.dirname(os.path.abspath(__file__)))!r})\n"
+    "import ppt_pdf_merger\n"
+    "ppt_pdf_merger.write_placeholder_pdf(sys.argv[1].rsplit('.', 1)[0] + '.pdf', int(sys.argv[2]))\n"
+)
+
+
+def _one_to_one(first: int, last: int):
+    return [(index, number - 1) for index, number in enumerate(range(first, last + 1))]
+
+
+class SelectedPagesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="slides_test_")
+        self.pptx = os.path.join(self.tmp_dir, "deck.pptx")
+        with zipfile.ZipFile(self.pptx, "w") as archive:
+            archive.writestr("ppt/presentation.xml", "<p:presentation/>")
+            for number in range(1, 21):
+                archive.writestr(f"ppt/slides/slide{number}.xml", "<p:sld/>")
+                archive.writestr(f"ppt/slides/_rels/slide{number}.xml.rels", "<Relationships/>")
+        # .ppt 读不出幻灯片数
+        self.ppt = os.path.join(self.tmp_dir, "legacy.ppt")
+        with open(self.ppt, "wb") as deck_file:
+            deck_file.write(os.urandom(2048))
+        self.context = merger.EngineContext(
+            self.tmp_dir,
+            merger.FontIndex(os.path.join(self.tmp_dir, "fonts.json"), font_dirs=[]),
+            merger.ConversionCache(os.path.join(self.tmp_dir, "cache")),
+            merger.fake_converter_command,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _pages(self, path: str, slides: str):
+        item = merger.PPTItem(display_name=os.path.basename(path), file_path=path, slides=slides)
+        engine = merger.MergeEngine(self.context, self.tmp_dir, [item])
+        (_name, pdf_path, _cached), = engine._convert_ppts_to_pdfs()
+        return engine._selected_pages(pdf_path, item)
+
+    def _full_export(self, pages: int):
+        self.context.command_factory = lambda ppt_path, slides: [
+            sys.executable, "-c", FULL_EXPORT_SCRIPT, ppt_path, str(pages)
+        ]
+
+    def test_counts_slide_parts(self):
+        self.assertEqual(merger.count_pptx_slides(self.pptx), 20)
+        self.assertIsNone(merger.count_pptx_slides(self.ppt))
+
+    def test_range_past_end_exported_by_converter(self):
+        # 转换器只导出 3-20 共 18 页：逐页对应
+        self.assertEqual(self._pages(self.pptx, "3-22"), _one_to_one(3, 20))
+
+    def test_range_past_end_with_full_export(self):
+        # 转换器忽略范围导出了全部 20 页：先挑出 3-20 再逐页对应
+        self._full_export(20)
+        self.assertEqual(self._pages(self.pptx, "3-22"), _one_to_one(3, 20))
+
+    def test_legacy_deck_with_range_applied(self):
+        # 读不出幻灯片数时也不按页数猜测：转换器报告已按范围导出，16 页逐页对应 5-20
+        self.assertEqual(self._pages(self.ppt, "5-20"), _one_to_one(5, 20))
+
+    def test_legacy_deck_with_full_export(self):
+        self._full_export(30)
+        self.assertEqual(self._pages(self.ppt, "5-20"), _one_to_one(5, 20))
+
+    def test_range_entirely_past_end(self):
+        with self.assertRaises(RuntimeError):
+            self._pages(self.pptx, "21-30")
+        self._full_export(20)
+        with self.assertRaises(RuntimeError):
+            self._pages(self.pptx, "25-30")
+
+
+if __name__ == "__main__":
+    unittest.main()
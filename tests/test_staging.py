@@ -0,0 +1,45 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ppt_pdf_merger as merger  # noqa: E402
+
+
+class StagingAreaTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="staging_test_")
+        self.remote = os.path.join(self.tmp_dir, "share")
+        self.decks = []
+        for week in ("week1", "week2"):
+            os.makedirs(os.path.join(self.remote, week))
+            path = os.path.join(self.remote, week, "lecture.pptx")
+            with open(path, "wb") as deck_file:
+                deck_file.write(week.encode("ascii") * 100)
+            self.decks.append(path)
+        self.options = merger.StagingOptions(mode="always", root=os.path.join(self.tmp_dir, "stage"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as staged_file:
+            return staged_file.read()
+
+    def test_same_file_name_from_different_folders(self):
+        local_paths = merger.StagingArea(self.remote, self.options).stage(self.decks)
+        self.assertEqual(len(set(local_paths.values())), 2)
+        for remote_path, local_path in local_paths.items():
+            self.assertTrue(local_path.endswith("_lecture.pptx"))
+            self.assertEqual(self._read(local_path), self._read(remote_path))
+
+    def test_restaged_paths_are_stable(self):
+        first = merger.StagingArea(self.remote, self.options).stage(self.decks)
+        self.assertEqual(merger.StagingArea(self.remote, self.options).stage(self.decks), first)
+
+
+if __name__ == "__main__":
+    unittest.main()